@@ -1,22 +1,52 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.authorize import AuthorizationEngine
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.encoders import jsonable_encoder
+from app.authorize import AuthorizationEngine, AsyncAuthorizationEngine
 from app.model import AuthorizationRequest, PreVerificationRequest
 
-app = FastAPI(title="Mock Bank API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    async_engine.close()
+
+
+app = FastAPI(title="Mock Bank API", lifespan=lifespan)
 
 engine = AuthorizationEngine()
+async_engine = AsyncAuthorizationEngine(engine)
 
 
 @app.post("/pre-verify")
-def pre_verify(request: PreVerificationRequest):
-    return engine.pre_verify_transaction(request)
+async def pre_verify(request: PreVerificationRequest):
+    return await async_engine.pre_verify_transaction(request)
 
 
 @app.post("/authorize")
-def authorize(request: AuthorizationRequest):
-    return engine.authorize_transaction(request)
+async def authorize(request: AuthorizationRequest):
+    return await async_engine.authorize_transaction(request)
 
 
 @app.get("/health")
 def health():
-    return {"status": "Bank API running"}
\ No newline at end of file
+    return {
+        "status": "Bank API running",
+        "seeding": engine.seeding_status(),
+        "write_behind": engine.write_behind_status()
+    }
+
+
+@app.get("/ready")
+def ready():
+    body = {"ready": engine.is_ready(), "seeding": engine.seeding_status()}
+    return JSONResponse(
+        jsonable_encoder(body),
+        status_code=200 if body["ready"] else 503
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return engine.metrics.render_prometheus()
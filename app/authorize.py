@@ -1,36 +1,144 @@
+import asyncio
+import os
+import sqlite3
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 from app.model import (
     AuthorizationRequest,
     AuthorizationResponse,
+    BatchItemError,
     TransactionStatus,
     PreVerificationRequest,
     PreVerificationResponse,
+    MerchantAnalytics,
+    TimeSeriesPoint,
+    TimeSeriesResponse,
     Transaction
 )
 
 from app.risk_detection import RiskEngine
-from app.repository.transaction import TransactionRepository
-from app.core.population import generate_population
-from app.core.history import seed_transaction_history
+from app.repository.transaction import (
+    POOL_SIZE,
+    TransactionRepository,
+    choose_series_bucket,
+)
+from app.repository.retention import retention_cutoff
+from app.repository.writer import WriteBehindWriter
+from app.core.history import seed_progress, start_background_seed
+from app.metrics import Metrics
+from app.state.backend import create_state_backend
+from app.state.recent import RecentDecisions
+from app.state.velocity import epoch_seconds
+
+# "background": seed an empty DB from a thread after startup
+# "off": never seed here, run `python -m app.core.history` instead
+SEED_MODE = os.environ.get("OVERIDE_SEED_MODE", "background")
+
+# Persist decisions from a background group-commit writer instead of inline
+WRITE_BEHIND = os.environ.get("OVERIDE_WRITE_BEHIND", "0") == "1"
+
+# Decisions kept in memory for the recent-transactions view
+RECENT_CAPACITY = int(os.environ.get("OVERIDE_RECENT_CAPACITY", 10_000))
+
+# Async engine: threads dedicated to blocking DB work, and the most
+# requests allowed in flight at once (the rest wait their turn)
+DB_WORKERS = int(os.environ.get("OVERIDE_DB_WORKERS", POOL_SIZE))
+MAX_IN_FLIGHT = int(os.environ.get("OVERIDE_MAX_IN_FLIGHT", 1000))
 
 
 class AuthorizationEngine:
 
-    def __init__(self):
-        self.risk_engine = RiskEngine()
+    def __init__(
+        self,
+        seed_mode: str = SEED_MODE,
+        write_behind: bool = WRITE_BEHIND,
+        state_backend=None
+    ):
+        # Velocity windows and pre-verification tokens live in the state
+        # backend: per process by default, or shared across workers
+        self.state = state_backend or create_state_backend()
+        self.risk_engine = RiskEngine(velocity_tracker=self.state.velocity)
         self.repository = TransactionRepository()
+        self.writer = WriteBehindWriter(self.repository) if write_behind else None
 
-        self.pre_verified_tokens: Dict[str, PreVerificationResponse] = {}
-        self.transaction_history = []
+        self.pre_verified_tokens = self.state.tokens
+        self.recent_decisions = RecentDecisions(RECENT_CAPACITY)
+
+        # Shared backends keep their own state across restarts
+        if not self.state.persistent:
+            self._warm_start_velocity()
+
+        self.metrics = Metrics()
+        self._register_gauges()
+
+        # Seed population only if DB empty, without blocking startup
+        if seed_mode == "background":
+            start_background_seed(5000, transactions_per_customer=100)
+
+    def _register_gauges(self):
+        tracker = self.risk_engine.velocity_tracker
+        self.metrics.gauge(
+            "velocity_tracked_customers",
+            lambda: tracker.stats()["customers"],
+            "Customers with a live velocity window"
+        )
+        self.metrics.gauge(
+            "preverify_tokens",
+            lambda: len(self.pre_verified_tokens),
+            "Outstanding pre-verification tokens"
+        )
+        self.metrics.gauge(
+            "write_queue_depth",
+            lambda: self.writer.depth() if self.writer else 0,
+            "Decisions waiting for the write-behind writer"
+        )
+        self.metrics.gauge(
+            "write_failed_rows",
+            lambda: self.writer.failed_rows if self.writer else 0,
+            "Accepted decisions the write-behind writer could not persist"
+        )
+        self.metrics.gauge(
+            "recent_decisions",
+            lambda: len(self.recent_decisions),
+            "Decisions held in the recent-decisions ring"
+        )
 
-        # Seed population only if DB empty
-        if not self.repository.get_all_transactions():
-            customers = generate_population(5000)
-            seed_transaction_history(customers, transactions_per_customer=100)
+    # ------------------------
+    # HEALTH
+    # ------------------------
+    def seeding_status(self) -> dict:
+        return seed_progress.snapshot()
+
+    def write_behind_status(self):
+        return self.writer.stats() if self.writer else None
+
+    def is_ready(self) -> bool:
+        if seed_progress.state == "external":
+            return not self.repository.seed_claimed()
+        return not seed_progress.in_progress
+
+    def close(self):
+        # Drain queued writes on shutdown
+        if self.writer:
+            self.writer.close()
+        self.state.close()
+
+    def _warm_start_velocity(self):
+        # Replays the last velocity window from the transactions table, an
+        # index range scan on ts_us, so every worker starts from what all
+        # workers committed
+        tracker = self.risk_engine.velocity_tracker
+        since = datetime.now() - timedelta(seconds=tracker.window)
+        tracker.load_events(
+            (customer_id, epoch_seconds(timestamp))
+            for customer_id, timestamp in self.repository.iter_customer_activity(since)
+        )
 
     # ------------------------
     # PRE-VERIFICATION
@@ -43,8 +151,6 @@ class AuthorizationEngine:
         verification_token = str(uuid.uuid4())
         expires_at = datetime.now() + timedelta(minutes=15)
 
-        key = f"{request.customer_id}:{request.amount}"
-
         response = PreVerificationResponse(
             verification_token=verification_token,
             expires_at=expires_at,
@@ -52,7 +158,7 @@ class AuthorizationEngine:
             message="Pre-verification successful."
         )
 
-        self.pre_verified_tokens[key] = response
+        self.pre_verified_tokens.put(request.customer_id, request.amount, response)
         return response
 
     # ------------------------
@@ -63,24 +169,44 @@ class AuthorizationEngine:
         request: AuthorizationRequest
     ) -> AuthorizationResponse:
 
-        start_time = time.time()
+        with self.metrics.span("authorize_total"):
+            transaction, response = self.evaluate_transaction(request)
+
+            # Save to DB
+            self.persist(transaction, response)
+
+        return response
+
+    def evaluate_transaction(
+        self,
+        request: AuthorizationRequest
+    ) -> Tuple[Transaction, AuthorizationResponse]:
+
+        # Scoring and decision only, no DB write; split out so the async
+        # engine can run it on the event loop and offload persistence
+        start_ns = time.perf_counter_ns()
         transaction = request.transaction
 
-        risk_assessment = self.risk_engine.calculate_risk_score(transaction)
+        with self.metrics.span("risk_scoring"):
+            risk_assessment = self.risk_engine.calculate_risk_score(transaction)
 
-        is_pre_verified = self._check_pre_verification(
-            transaction.customer_id,
-            transaction.amount,
-            request.customer_verification_token
-        )
+        with self.metrics.span("preverify_lookup"):
+            is_pre_verified = self._check_pre_verification(
+                transaction.customer_id,
+                transaction.amount,
+                request.customer_verification_token
+            )
 
-        status, approved, message, revenue_saved = self._make_decision(
-            risk_assessment,
-            is_pre_verified,
-            transaction.amount
-        )
+        with self.metrics.span("decision"):
+            status, approved, message, revenue_saved = self._make_decision(
+                risk_assessment,
+                is_pre_verified,
+                transaction.amount
+            )
 
-        processing_time = (time.time() - start_time) * 1000
+        # Persistence happens after the response exists, so it is only in
+        # the authorize_total and persistence metrics, not in this figure
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e6
 
         response = AuthorizationResponse(
             transaction_id=transaction.transaction_id,
@@ -92,17 +218,237 @@ class AuthorizationEngine:
             revenue_saved=revenue_saved
         )
 
-        # Save to DB
-        self.repository.save_transaction(transaction, response)
+        self.recent_decisions.append(transaction, response, is_pre_verified)
 
-        self.transaction_history.append({
-            'transaction': transaction,
-            'response': response,
-            'timestamp': datetime.utcnow(),
-            'pre_verified': is_pre_verified
-        })
+        return transaction, response
 
-        return response
+    # ------------------------
+    # BATCH AUTHORIZATION
+    # ------------------------
+    def authorize_batch(
+        self,
+        requests: List[AuthorizationRequest]
+    ) -> List[Union[AuthorizationResponse, BatchItemError]]:
+
+        with self.metrics.span("authorize_batch_total"):
+            accepted, errors = self.screen_batch(requests)
+            decisions = self.evaluate_batch([requests[i] for i in accepted])
+
+            # Save to DB in one transaction
+            failed = self.persist_many(decisions)
+
+        return self.batch_results(requests, accepted, decisions, errors, failed)
+
+    def screen_batch(
+        self,
+        requests: List[AuthorizationRequest]
+    ) -> Tuple[List[int], Dict[int, str]]:
+        # Transaction ids repeated within the batch or already stored are
+        # turned away before scoring, so they never reach velocity or the
+        # recent-decisions ring. Returns the indexes to score and an error
+        # per rejected index.
+        ids = [request.transaction.transaction_id for request in requests]
+        stored = self.repository.existing_transaction_ids(set(ids))
+
+        accepted, errors, seen = [], {}, set()
+        for index, transaction_id in enumerate(ids):
+            if transaction_id in stored:
+                errors[index] = "transaction_id already recorded"
+            elif transaction_id in seen:
+                errors[index] = "transaction_id repeated within the batch"
+            else:
+                seen.add(transaction_id)
+                accepted.append(index)
+        return accepted, errors
+
+    @staticmethod
+    def batch_results(requests, accepted, decisions, errors, failed):
+        # Request order: the decision, or a BatchItemError for items
+        # rejected up front (errors, by index) or not saved (failed, by id)
+        results = [None] * len(requests)
+        for index, (transaction, response) in zip(accepted, decisions):
+            if transaction.transaction_id in failed:
+                errors[index] = failed[transaction.transaction_id]
+            else:
+                results[index] = response
+        for index, error in errors.items():
+            results[index] = BatchItemError(
+                transaction_id=requests[index].transaction.transaction_id,
+                error=error
+            )
+        return results
+
+    def evaluate_batch(
+        self,
+        requests: List[AuthorizationRequest]
+    ) -> List[Tuple[Transaction, AuthorizationResponse]]:
+
+        start_ns = time.perf_counter_ns()
+        transactions = [request.transaction for request in requests]
+
+        # Scored together; velocity still advances per customer in order
+        with self.metrics.span("batch_risk_scoring"):
+            assessments = self.risk_engine.calculate_risk_scores(transactions)
+
+        decisions = []
+        for request, risk_assessment in zip(requests, assessments):
+            transaction = request.transaction
+            is_pre_verified = self._check_pre_verification(
+                transaction.customer_id,
+                transaction.amount,
+                request.customer_verification_token
+            )
+            decisions.append((
+                is_pre_verified,
+                self._make_decision(
+                    risk_assessment,
+                    is_pre_verified,
+                    transaction.amount
+                )
+            ))
+
+        # Batch cost is shared evenly across its items
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e6 / max(1, len(requests))
+
+        responses = []
+        for transaction, risk_assessment, (is_pre_verified, decision) in zip(
+            transactions,
+            assessments,
+            decisions
+        ):
+            status, approved, message, revenue_saved = decision
+            response = AuthorizationResponse(
+                transaction_id=transaction.transaction_id,
+                status=status,
+                risk_assessment=risk_assessment,
+                approved=approved,
+                message=message,
+                processing_time_ms=processing_time,
+                revenue_saved=revenue_saved
+            )
+            responses.append(response)
+
+            self.recent_decisions.append(transaction, response, is_pre_verified)
+
+        return list(zip(transactions, responses))
+
+    # ------------------------
+    # ANALYTICS
+    # ------------------------
+    def get_merchant_analytics(
+        self,
+        merchant_id: str,
+        start: datetime,
+        end: datetime
+    ) -> MerchantAnalytics:
+
+        # Day granularity: answered from merchant_daily_rollup
+        totals = self.repository.get_merchant_rollup(
+            merchant_id,
+            start.date(),
+            end.date()
+        )
+        total = totals["total"]
+        approved = totals["approved"] + totals["pre_verified"]
+
+        return MerchantAnalytics(
+            merchant_id=merchant_id,
+            period_start=start,
+            period_end=end,
+            total_transactions=total,
+            total_approved=totals["approved"],
+            total_declined=totals["declined"],
+            total_pre_verified=totals["pre_verified"],
+            fraud_prevented_count=totals["fraud_prevented"],
+            revenue_saved=totals["revenue_saved"],
+            approval_rate=(approved / total * 100) if total else 0.0,
+            avg_risk_score=(totals["risk_score_sum"] / total) if total else 0.0
+        )
+
+    def get_time_series(
+        self,
+        start: datetime,
+        end: datetime,
+        bucket: Optional[str] = None
+    ) -> TimeSeriesResponse:
+
+        # Answered from time_rollup: a few hundred rows at most whatever
+        # the size of the transactions table. A requested bucket too fine
+        # for that, or for what retention has kept, is coarsened; the
+        # response names the bucket used.
+        bucket = choose_series_bucket(start, end, bucket, minutes_since=retention_cutoff())
+        rows = self.repository.get_time_series(start, end, bucket)
+
+        return TimeSeriesResponse(
+            bucket=bucket,
+            period_start=start,
+            period_end=end,
+            points=[
+                TimeSeriesPoint(
+                    bucket_start=bucket_start,
+                    count=total,
+                    approved_count=approved,
+                    amount_sum=amount_sum,
+                    mean_risk_score=(risk_score_sum / total) if total else 0.0
+                )
+                for bucket_start, total, approved, amount_sum, risk_score_sum in rows
+            ]
+        )
+
+    # ------------------------
+    # TRANSACTION HISTORY
+    # ------------------------
+    def get_transaction_history(self, limit: int = 50, cursor=None, **filters) -> dict:
+        rows, next_cursor = self.repository.page_transactions(
+            limit=limit,
+            cursor=cursor,
+            **filters
+        )
+        return {"transactions": rows, "next_cursor": next_cursor}
+
+    def stream_transaction_history(self, cursor=None, **filters):
+        return self.repository.iter_transactions(cursor=cursor, **filters)
+
+    def get_recent_decisions(self, limit: int = 50, merchant_id: Optional[str] = None):
+        # Served from memory: only decisions made by this process
+        if merchant_id:
+            decisions = self.recent_decisions.last_for_merchant(merchant_id, limit)
+        else:
+            decisions = self.recent_decisions.last(limit)
+        return [decision.as_dict() for decision in decisions]
+
+    # ------------------------
+    # PERSISTENCE
+    # ------------------------
+    def persist(self, transaction, response):
+        with self.metrics.span("persistence"):
+            if self.writer:
+                self.writer.submit(transaction, response)
+            else:
+                self.repository.save_transaction(transaction, response)
+
+    def persist_many(self, decisions) -> Dict[str, str]:
+        # Returns an error per transaction id that could not be saved
+        with self.metrics.span("batch_persistence"):
+            if self.writer:
+                for transaction, response in decisions:
+                    self.writer.submit(transaction, response)
+                return {}
+            try:
+                self.repository.save_transactions(decisions)
+                return {}
+            except sqlite3.IntegrityError:
+                pass
+
+            # A concurrent request stored one of the ids after screening;
+            # the rest of the batch is saved row by row
+            failed = {}
+            for transaction, response in decisions:
+                try:
+                    self.repository.save_transaction(transaction, response)
+                except sqlite3.IntegrityError:
+                    failed[transaction.transaction_id] = "transaction_id already recorded"
+            return failed
 
     # ------------------------
     # HELPERS
@@ -117,16 +463,14 @@ class AuthorizationEngine:
         if not verification_token:
             return False
 
-        key = f"{customer_id}:{amount}"
-        stored_verification = self.pre_verified_tokens.get(key)
+        # Expired tokens are never returned by the store
+        entry = self.pre_verified_tokens.get(verification_token)
 
-        if not stored_verification:
+        if not entry:
             return False
 
-        if stored_verification.verification_token != verification_token:
-            return False
-
-        if datetime.now() > stored_verification.expires_at:
+        # The token only covers the customer and amount it was issued for
+        if entry.customer_id != customer_id or entry.amount != amount:
             return False
 
         return True
@@ -161,4 +505,113 @@ class AuthorizationEngine:
             False,
             f"Transaction declined - High risk ({risk_score:.1f}/100).",
             0.0
-        )
\ No newline at end of file
+        )
+
+
+class AsyncAuthorizationEngine:
+    # Async front for AuthorizationEngine. Scoring and decisions are
+    # in-memory and cheap, so they run on the event loop; every blocking
+    # SQLite call goes to a dedicated, sized executor instead of Starlette's
+    # shared threadpool. With a shared state backend, scoring itself touches
+    # SQLite and is offloaded as well.
+
+    def __init__(
+        self,
+        engine: Optional[AuthorizationEngine] = None,
+        db_workers: int = DB_WORKERS,
+        max_in_flight: int = MAX_IN_FLIGHT
+    ):
+        self.engine = engine or AuthorizationEngine()
+        self.executor = ThreadPoolExecutor(
+            max_workers=db_workers,
+            thread_name_prefix="override-db"
+        )
+        self.max_in_flight = max_in_flight
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.active = 0
+        self._offload_state = self.engine.state.persistent
+
+        self.engine.metrics.gauge(
+            "requests_in_flight",
+            lambda: self.active,
+            "Requests admitted by the async engine"
+        )
+
+    async def run(self, fn, *args, **kwargs):
+        # Any blocking call, on the DB executor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def _maybe_offload(self, fn, *args):
+        if self._offload_state:
+            return await self.run(fn, *args)
+        return fn(*args)
+
+    @asynccontextmanager
+    async def _admit(self):
+        async with self._in_flight:
+            self.active += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
+
+    async def pre_verify_transaction(
+        self,
+        request: PreVerificationRequest
+    ) -> PreVerificationResponse:
+        async with self._admit():
+            return await self._maybe_offload(self.engine.pre_verify_transaction, request)
+
+    async def authorize_transaction(
+        self,
+        request: AuthorizationRequest
+    ) -> AuthorizationResponse:
+        async with self._admit():
+            with self.engine.metrics.span("authorize_total"):
+                transaction, response = await self._maybe_offload(
+                    self.engine.evaluate_transaction,
+                    request
+                )
+                await self.run(self.engine.persist, transaction, response)
+            return response
+
+    async def authorize_batch(
+        self,
+        requests: List[AuthorizationRequest]
+    ) -> List[Union[AuthorizationResponse, BatchItemError]]:
+        async with self._admit():
+            with self.engine.metrics.span("authorize_batch_total"):
+                accepted, errors = await self.run(self.engine.screen_batch, requests)
+                decisions = await self._maybe_offload(
+                    self.engine.evaluate_batch,
+                    [requests[i] for i in accepted]
+                )
+                failed = await self.run(self.engine.persist_many, decisions)
+            return self.engine.batch_results(requests, accepted, decisions, errors, failed)
+
+    async def get_merchant_analytics(self, merchant_id: str, start: datetime, end: datetime):
+        async with self._admit():
+            return await self.run(
+                self.engine.get_merchant_analytics,
+                merchant_id,
+                start,
+                end
+            )
+
+    async def get_time_series(self, start: datetime, end: datetime, bucket=None):
+        async with self._admit():
+            return await self.run(self.engine.get_time_series, start, end, bucket)
+
+    async def get_transaction_history(self, limit: int = 50, cursor=None, **filters):
+        async with self._admit():
+            return await self.run(
+                self.engine.get_transaction_history,
+                limit,
+                cursor,
+                **filters
+            )
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.engine.close()
@@ -1,20 +1,327 @@
-from app.repository.transaction import TransactionRepository
-from app.core.population import generate_transaction
+import argparse
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 
+from app.repository.transaction import TransactionRepository, BULK_CHUNK_SIZE
+from app.core.population import (
+    DEFAULT_SEED,
+    generate_history_batches,
+    generate_history_shard,
+    generate_transaction,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds the startup seed sleeps after each intermediate commit. SQLite's
+# busy handler retries a locked write every 100ms at most, so a shorter gap
+# between the seed's transactions would starve live writers.
+SEED_COMMIT_PAUSE = 0.1
+
+
+class SeedProgress:
+    # Shared by the background seeder and the /health and /ready endpoints
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = "idle"
+        self.rows_total = 0
+        self.rows_written = 0
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+    def start(self, rows_total: int) -> bool:
+        with self._lock:
+            if self.state == "seeding":
+                return False
+            self.state = "seeding"
+            self.rows_total = rows_total
+            self.rows_written = 0
+            self.started_at = datetime.now()
+            self.finished_at = None
+            self.error = None
+            return True
+
+    def update(self, rows_written: int):
+        self.rows_written = rows_written
+
+    def external(self):
+        # Another worker process holds the seed claim for the shared DB
+        with self._lock:
+            self.state = "external"
+
+    def finish(self, error=None):
+        with self._lock:
+            self.state = "failed" if error else "done"
+            self.error = str(error) if error else None
+            self.finished_at = datetime.now()
+
+    @property
+    def in_progress(self) -> bool:
+        return self.state == "seeding"
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "rows_written": self.rows_written,
+            "rows_total": self.rows_total,
+            "percent": (
+                round(100 * self.rows_written / self.rows_total, 1)
+                if self.rows_total else 0.0
+            ),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
 
-def seed_transaction_history(customers: dict, transactions_per_customer=100):
-    repo = TransactionRepository()
 
+seed_progress = SeedProgress()
+
+
+def _seed_rows(customers: dict, transactions_per_customer: int):
     for traits in customers.values():
         for _ in range(transactions_per_customer):
+            yield TransactionRepository.seed_row(**generate_transaction(traits))
+
+
+def _timed_load(load):
+    start = time.perf_counter()
+    inserted = load()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "rows": inserted,
+        "seconds": elapsed,
+        "rows_per_sec": inserted / elapsed if elapsed else 0.0,
+    }
+
+
+def seed_transaction_history(
+    customers: dict,
+    transactions_per_customer=100,
+    chunk_size=BULK_CHUNK_SIZE,
+    vectorized=True,
+    seed: int = DEFAULT_SEED,
+    now=None
+):
+    repo = TransactionRepository()
+
+    if vectorized:
+        return _timed_load(lambda: repo.bulk_insert_columns(
+            generate_history_batches(
+                customers,
+                transactions_per_customer,
+                customers_per_batch=max(1, chunk_size // transactions_per_customer),
+                now=now,
+                seed=seed
+            ),
+            chunk_size=chunk_size
+        ))
+
+    return _timed_load(lambda: repo.bulk_insert(
+        _seed_rows(customers, transactions_per_customer),
+        chunk_size=chunk_size
+    ))
+
+
+def _parallel_history(
+    n_customers,
+    transactions_per_customer,
+    customers_per_batch,
+    workers,
+    seed,
+    now
+):
+    # Workers generate one batch each; the parent is the only SQLite writer
+    # and consumes results in submission order. At most 2 * workers batches
+    # are in flight so memory stays flat however large n_customers is.
+    if workers <= 1:
+        for start in range(0, n_customers, customers_per_batch):
+            yield generate_history_shard(
+                start,
+                min(start + customers_per_batch, n_customers),
+                transactions_per_customer,
+                now,
+                seed
+            )
+        return
+
+    starts = iter(range(0, n_customers, customers_per_batch))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def submit_next():
+            start = next(starts, None)
+            if start is None:
+                return
+            pending.append(pool.submit(
+                generate_history_shard,
+                start,
+                min(start + customers_per_batch, n_customers),
+                transactions_per_customer,
+                now,
+                seed
+            ))
+
+        for _ in range(2 * workers):
+            submit_next()
+
+        while pending:
+            columns = pending.popleft().result()
+            submit_next()
+            yield columns
+
+
+def seed_population_history(
+    n_customers: int,
+    transactions_per_customer=100,
+    workers=None,
+    chunk_size=BULK_CHUNK_SIZE,
+    seed: int = DEFAULT_SEED,
+    now=None,
+    on_progress=None,
+    commit_every=None,
+    commit_pause=0.0
+):
+    # Builds the population and its history from the seed alone, sharding
+    # customers across a process pool. Row content (everything but the
+    # random transaction ids) is identical for any worker count given the
+    # same seed, now and chunk_size.
+    if workers is None:
+        workers = os.cpu_count() or 1
+    now = now or datetime.now()
+    customers_per_batch = max(1, chunk_size // transactions_per_customer)
+
+    repo = TransactionRepository()
+    batches = _parallel_history(
+        n_customers,
+        transactions_per_customer,
+        customers_per_batch,
+        workers,
+        seed,
+        now
+    )
+    return _timed_load(
+        lambda: repo.bulk_insert_columns(
+            batches,
+            chunk_size=chunk_size,
+            on_progress=on_progress,
+            commit_every=commit_every,
+            commit_pause=commit_pause
+        )
+    )
+
+
+def _run_tracked_seed(n_customers, transactions_per_customer, workers):
+    # Commits every chunk and pauses after each commit: the server is
+    # taking authorizations meanwhile, and one transaction for the whole
+    # load would hold the write lock past their busy timeout. Each commit
+    # also refreshes the seed claim, so however long the seed runs other
+    # workers never take it over.
+    repo = TransactionRepository()
+    owner = os.getpid()
+
+    def on_progress(rows_written):
+        seed_progress.update(rows_written)
+        repo.refresh_seed_claim(owner)
+
+    try:
+        stats = seed_population_history(
+            n_customers,
+            transactions_per_customer,
+            workers=workers,
+            on_progress=on_progress,
+            commit_every=BULK_CHUNK_SIZE,
+            commit_pause=SEED_COMMIT_PAUSE
+        )
+    except Exception as exc:
+        repo.finish_seed_claim(failed=True)
+        seed_progress.finish(error=exc)
+        logger.exception("background seed failed")
+        return None
+
+    repo.finish_seed_claim()
+    seed_progress.finish()
+    logger.info(
+        "Seeded %s transactions in %.1fs (%s rows/sec)",
+        f"{stats['rows']:,}", stats["seconds"], f"{stats['rows_per_sec']:,.0f}"
+    )
+    return stats
+
+
+def start_background_seed(
+    n_customers: int = 5000,
+    transactions_per_customer=100,
+    workers=1
+):
+    # Returns None when the table already has rows or a seed is already
+    # running, in this process or (through the DB's seed claim) in another
+    # worker. Defaults to in-process generation: forking a pool from a live
+    # server thread is best avoided, the CLI is the place for multi-core
+    # seeding.
+    if seed_progress.in_progress:
+        return None
+    repo = TransactionRepository()
+    if not repo.claim_seed(os.getpid()):
+        owner = repo.seed_claim_owner()
+        if owner is not None and owner != str(os.getpid()):
+            seed_progress.external()
+        return None
+    if not seed_progress.start(n_customers * transactions_per_customer):
+        repo.finish_seed_claim(failed=True)
+        return None
+
+    thread = threading.Thread(
+        target=_run_tracked_seed,
+        args=(n_customers, transactions_per_customer, workers),
+        name="history-seeder",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+# ------------------------
+# CLI: python -m app.core.history
+# ------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Seed the transactions table with synthetic history."
+    )
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--per-customer", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Seed even if the table already has rows"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.force and TransactionRepository().has_transactions():
+        print("transactions table already populated; use --force to add more")
+        return
+
+    stats = seed_population_history(
+        args.customers,
+        args.per_customer,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        on_progress=lambda rows: print(f"\r{rows:,} rows", end="", flush=True)
+    )
+    print(
+        f"\nSeeded {stats['rows']:,} transactions in {stats['seconds']:.1f}s "
+        f"({stats['rows_per_sec']:,.0f} rows/sec)"
+    )
 
-            tx_data = generate_transaction(traits)
 
-            # Fake approval + risk for historical realism
-            repo.save_transaction_from_seed(
-                transaction_id=tx_data["transaction_id"],
-                customer_id=tx_data["customer_id"],
-                merchant_id=tx_data["merchant_id"],
-                amount=tx_data["amount"],
-                timestamp=tx_data["timestamp"]
-            )
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
-import random
+import hashlib
+import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import numpy as np
 
@@ -12,45 +14,103 @@ INCOME_DISTRIBUTION = {
 
 MERCHANTS = [f"merchant_{i:03d}" for i in range(1, 201)]
 
+# Root seed for synthetic data; the same seed always yields the same population
+DEFAULT_SEED = 20240101
+
+# spawn_key namespaces so trait and history streams never overlap
+_TRAITS_STREAM = 0
+_HISTORY_STREAM = 1
+
+
+def _stable_key(customer_id: str) -> int:
+    # hash() is salted per process, blake2b is not
+    digest = hashlib.blake2b(customer_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def customer_rng(customer_id: str, seed: int = DEFAULT_SEED) -> np.random.Generator:
+    return np.random.default_rng(
+        np.random.SeedSequence(
+            seed,
+            spawn_key=(_TRAITS_STREAM, _stable_key(customer_id))
+        )
+    )
+
+
+def customer_id_for(index: int) -> str:
+    return f"cust_{index:05d}"
+
 
 class CustomerTraits:
-    def __init__(self, customer_id: str):
-        random.seed(hash(customer_id))
+    def __init__(self, customer_id: str, seed: int = DEFAULT_SEED):
+        # Private stream per customer: no global state, safe in any process
+        self.rng = customer_rng(customer_id, seed)
+        rng = self.rng
 
         self.customer_id = customer_id
-        self.income = random.choice(["low", "mid", "high"])
+        self.income = ["low", "mid", "high"][rng.integers(3)]
         self.mean_spend, self.sigma = INCOME_DISTRIBUTION[self.income]
-        self.active_start = random.randint(6, 10)
-        self.active_end = random.randint(18, 23)
-        self.merchant_pool = random.sample(
-            MERCHANTS, 
-            random.randint(5, 25)
-        )
-        self.volatility = random.uniform(0.8, 1.5)
-        self.base_risk = random.uniform(0.01, 0.2)
+        self.active_start = int(rng.integers(6, 11))
+        self.active_end = int(rng.integers(18, 24))
+        self.merchant_pool = [
+            MERCHANTS[i]
+            for i in rng.choice(
+                len(MERCHANTS),
+                size=int(rng.integers(5, 26)),
+                replace=False
+            )
+        ]
+        self.volatility = float(rng.uniform(0.8, 1.5))
+        self.base_risk = float(rng.uniform(0.01, 0.2))
 
 
-def generate_population(n: int):
+def _build_customers(start: int, stop: int, seed: int):
+    return [CustomerTraits(customer_id_for(i), seed) for i in range(start, stop)]
+
+
+def generate_population(
+    n: int,
+    seed: int = DEFAULT_SEED,
+    workers: int = 1,
+    shard_size: int = 10_000
+):
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or n <= shard_size:
+        shards = [_build_customers(0, n, seed)]
+    else:
+        starts = range(0, n, shard_size)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = pool.map(
+                _build_customers,
+                starts,
+                [min(start + shard_size, n) for start in starts],
+                [seed] * len(starts)
+            )
+
     customers = {}
-    for i in range(n):
-        cid = f"cust_{i:05d}"
-        customers[cid] = CustomerTraits(cid)
+    for shard in shards:
+        for traits in shard:
+            customers[traits.customer_id] = traits
     return customers
 
 
 def generate_transaction(traits: CustomerTraits):
-    amount = np.random.lognormal(
+    rng = traits.rng
+
+    amount = rng.lognormal(
         mean=np.log(traits.mean_spend),
         sigma=traits.sigma * traits.volatility
     )
 
-    merchant = random.choice(traits.merchant_pool)
+    merchant = traits.merchant_pool[rng.integers(len(traits.merchant_pool))]
 
-    hour = random.randint(traits.active_start, traits.active_end)
+    hour = int(rng.integers(traits.active_start, traits.active_end + 1))
 
     timestamp = datetime.now() - timedelta(
-        days=random.randint(1, 180),
-        hours=random.randint(0, 23)
+        days=int(rng.integers(1, 181)),
+        hours=int(rng.integers(0, 24))
     )
 
     return {
@@ -59,4 +119,128 @@ def generate_transaction(traits: CustomerTraits):
         "merchant_id": merchant,
         "amount": round(float(amount), 2),
         "timestamp": timestamp,
-    }
\ No newline at end of file
+    }
+
+
+# ------------------------
+# BATCH GENERATION
+# ------------------------
+def _uuid4_strings(n: int):
+    # Same format as str(uuid.uuid4()), built in bulk. Drawn from os.urandom
+    # rather than the seeded stream: row content is reproducible per seed,
+    # ids must not be, or a second seeding run collides on the primary key.
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    hex_ids = raw.tobytes().hex()
+    return [
+        f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+        for h in (hex_ids[i:i + 32] for i in range(0, 32 * n, 32))
+    ]
+
+
+def _generate_columns(traits_list, per_customer: int, now=None, rng=None):
+    # All rows for a group of customers in one set of NumPy draws. Each
+    # customer's lognormal parameters and merchant pool are broadcast to
+    # its rows with np.repeat; merchants are drawn as indices into one
+    # flattened array of every pool in the group.
+    rng = rng if rng is not None else np.random.default_rng()
+    now = now or datetime.now()
+    n = len(traits_list) * per_customer
+
+    means = np.repeat(
+        np.log([t.mean_spend for t in traits_list]), per_customer
+    )
+    sigmas = np.repeat(
+        [t.sigma * t.volatility for t in traits_list], per_customer
+    )
+    amounts = np.round(rng.lognormal(mean=means, sigma=sigmas), 2)
+
+    pool_sizes = np.array([len(t.merchant_pool) for t in traits_list])
+    pool_offsets = np.concatenate(([0], np.cumsum(pool_sizes)[:-1]))
+    flat_pool = np.array(
+        [m for t in traits_list for m in t.merchant_pool], dtype=object
+    )
+    picks = (rng.random(n) * np.repeat(pool_sizes, per_customer)).astype(np.int64)
+    merchant_ids = flat_pool[np.repeat(pool_offsets, per_customer) + picks]
+
+    offsets = (
+        rng.integers(1, 181, size=n) * 86400
+        + rng.integers(0, 24, size=n) * 3600
+    )
+    timestamps = np.datetime64(now, "us") - offsets.astype("timedelta64[s]")
+
+    transaction_ids = _uuid4_strings(n)
+
+    customer_ids = np.repeat(
+        np.array([t.customer_id for t in traits_list], dtype=object),
+        per_customer
+    )
+
+    return {
+        "transaction_id": transaction_ids,
+        "customer_id": customer_ids,
+        "merchant_id": merchant_ids,
+        "amount": amounts,
+        "timestamp": timestamps,
+    }
+
+
+def generate_transaction_batch(
+    traits: CustomerTraits,
+    n: int,
+    now=None,
+    rng=None
+):
+    return _generate_columns([traits], n, now=now, rng=rng)
+
+
+def history_rng(batch_index: int, seed: int = DEFAULT_SEED) -> np.random.Generator:
+    return np.random.default_rng(
+        np.random.SeedSequence(seed, spawn_key=(_HISTORY_STREAM, batch_index))
+    )
+
+
+def generate_history_batches(
+    customers: dict,
+    transactions_per_customer=100,
+    customers_per_batch=1000,
+    now=None,
+    seed: int = DEFAULT_SEED,
+    first_index: int = 0,
+    rng=None
+):
+    # Each batch draws from its own stream keyed by the global index of its
+    # first customer, so output depends only on (seed, now, batch size) and
+    # not on how batches are spread across processes. Pass rng to share one
+    # stream across all batches instead.
+    now = now or datetime.now()
+
+    traits_list = list(customers.values())
+    for start in range(0, len(traits_list), customers_per_batch):
+        yield _generate_columns(
+            traits_list[start:start + customers_per_batch],
+            transactions_per_customer,
+            now=now,
+            rng=rng if rng is not None else history_rng(first_index + start, seed)
+        )
+
+
+def generate_history_shard(
+    start: int,
+    stop: int,
+    transactions_per_customer=100,
+    now=None,
+    seed: int = DEFAULT_SEED
+):
+    # Process-pool entry point: rebuilds customers [start, stop) locally
+    # from the seed instead of pickling traits over from the parent
+    customers = {t.customer_id: t for t in _build_customers(start, stop, seed)}
+    return next(generate_history_batches(
+        customers,
+        transactions_per_customer,
+        customers_per_batch=stop - start,
+        now=now,
+        seed=seed,
+        first_index=start
+    ))
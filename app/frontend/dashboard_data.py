@@ -0,0 +1,223 @@
+import os
+from collections import Counter, deque
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from app.repository.retention import retention_cutoff
+from app.repository.transaction import (
+    FRAUD_SCORE,
+    TransactionRepository,
+    choose_series_bucket,
+)
+
+# Seconds a cached aggregate is reused before the next rerun queries again
+CACHE_TTL = int(os.environ.get("OVERIDE_DASHBOARD_TTL", 30))
+
+# Points drawn in the amount vs risk scatter (newest transactions)
+SCATTER_POINTS = 2000
+
+RISK_BINS = 20
+
+# Rows shown in the recent and high-risk tables
+RECENT_ROWS = 50
+HIGH_RISK_ROWS = 20
+
+# Rows read per query when catching up past the watermark
+CATCH_UP_BATCH = 5000
+
+
+@st.cache_resource
+def _repository():
+    return TransactionRepository()
+
+
+def refresh():
+    # Drops every cached aggregate, e.g. right after a new authorization.
+    # Live figures need no reset: they pick up new rows on the next rerun.
+    st.cache_data.clear()
+
+
+# ------------------------
+# TTL-CACHED AGGREGATES (computed in SQL)
+# ------------------------
+@st.cache_data(ttl=CACHE_TTL)
+def load_directory():
+    repo = _repository()
+    return sorted(repo.get_unique_customers()), sorted(repo.get_unique_merchants())
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def load_top_approved(group_by, limit=10):
+    rows = _repository().get_top_approved_amounts(group_by, limit)
+    return pd.DataFrame(rows, columns=[group_by, 'amount'])
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def load_time_series(window_hours=None):
+    # Pre-bucketed from time_rollup, the same rows /analytics/series
+    # serves; window_hours=None covers all history. Returns (bucket, frame).
+    repo = _repository()
+    if window_hours is None:
+        time_range = repo.get_time_range()
+        if time_range is None:
+            return "day", pd.DataFrame()
+        start, end = time_range[0], time_range[1] + timedelta(hours=1)
+    else:
+        end = datetime.now()
+        start = end - timedelta(hours=window_hours)
+
+    bucket = choose_series_bucket(start, end, minutes_since=retention_cutoff())
+    rows = repo.get_time_series(start, end, bucket)
+    df = pd.DataFrame(rows, columns=[
+        'bucket_start', 'transaction_count', 'approved_count', 'amount_sum', 'risk_score_sum'
+    ])
+    df['mean_risk_score'] = df['risk_score_sum'] / df['transaction_count']
+    return bucket, df
+
+
+# ------------------------
+# LIVE FIGURES (rowid watermark)
+# ------------------------
+class LiveAggregates:
+    # Running dashboard figures for one browser session. The first load
+    # takes SQL aggregates pinned to the current max rowid; after that,
+    # update() reads only rows above the watermark and folds them in, so a
+    # rerun costs O(new rows) however large the table is.
+
+    def __init__(self, bins=RISK_BINS):
+        self.bins = bins
+        self.watermark = None
+        self.summary = {}
+        self.level_counts = Counter()
+        self.histogram = [0] * bins
+
+        # Newest first; appendleft pushes the oldest row out the right
+        self.recent = deque(maxlen=RECENT_ROWS)
+        self.high_risk = deque(maxlen=HIGH_RISK_ROWS)
+        self.scatter = deque(maxlen=SCATTER_POINTS)
+
+    def load(self, repo):
+        watermark = repo.get_max_rowid()
+        self.summary = repo.get_dashboard_summary(up_to_rowid=watermark)
+        self.level_counts = Counter(repo.get_risk_level_counts(up_to_rowid=watermark))
+        self.histogram = repo.get_risk_histogram(self.bins, up_to_rowid=watermark)
+
+        latest = repo.get_latest_rows(SCATTER_POINTS, up_to_rowid=watermark)
+        self.recent = deque(latest[:RECENT_ROWS], maxlen=RECENT_ROWS)
+        self.scatter = deque(latest, maxlen=SCATTER_POINTS)
+        self.high_risk = deque(
+            repo.get_latest_rows(HIGH_RISK_ROWS, watermark, high_risk_only=True),
+            maxlen=HIGH_RISK_ROWS
+        )
+        self.watermark = watermark
+
+    def update(self, repo) -> int:
+        # Returns how many new rows were folded in
+        if self.watermark is None:
+            self.load(repo)
+            return 0
+
+        folded = 0
+        while True:
+            rows = repo.get_rows_after(self.watermark, CATCH_UP_BATCH)
+            if not rows:
+                break
+            self.fold(rows)
+            self.watermark = rows[-1]["_rowid"]
+            folded += len(rows)
+            if len(rows) < CATCH_UP_BATCH:
+                break
+        return folded
+
+    def fold(self, rows):
+        # Same rules as TransactionRepository.get_dashboard_summary
+        summary = self.summary
+        for row in rows:
+            approved = row["approved"] == 1
+            level = (row["risk_level"] or "").lower()
+            risk_score = row["risk_score"] or 0.0
+            amount = row["amount"]
+
+            summary["total"] += 1
+            summary["approved"] += approved
+            summary["declined"] += row["approved"] == 0
+            summary["pre_verified"] += row["status"] == "pre_verified"
+            summary["approved_amount"] += amount if approved else 0.0
+            summary["revenue_saved"] += row["revenue_saved"] or 0.0
+            summary["amount_sum"] += amount
+            summary["max_amount"] = max(summary["max_amount"], amount)
+            summary["risk_score_sum"] += risk_score
+            summary["high_risk"] += level in ("high", "critical")
+            summary["medium_risk"] += level == "medium"
+            summary["low_risk"] += level == "low"
+            summary["fraud_prevented"] += row["approved"] == 0 and risk_score >= FRAUD_SCORE
+
+            self.level_counts[level] += 1
+            bin_index = min(int(risk_score * self.bins / 100), self.bins - 1)
+            self.histogram[max(0, bin_index)] += 1
+
+            self.recent.appendleft(row)
+            self.scatter.appendleft(row)
+            if level in ("high", "critical"):
+                self.high_risk.appendleft(row)
+
+        if summary["total"]:
+            summary["avg_amount"] = summary["amount_sum"] / summary["total"]
+            summary["avg_risk_score"] = summary["risk_score_sum"] / summary["total"]
+
+    # Frames for the charts and tables
+    def risk_levels_frame(self):
+        return pd.DataFrame({
+            'Risk Level': list(self.level_counts.keys()),
+            'Count': list(self.level_counts.values())
+        })
+
+    def histogram_frame(self):
+        width = 100 / self.bins
+        return pd.DataFrame({
+            'risk_score': [width * (i + 0.5) for i in range(self.bins)],
+            'count': self.histogram
+        })
+
+    def recent_frame(self):
+        return pd.DataFrame(list(self.recent))
+
+    def high_risk_frame(self):
+        return pd.DataFrame(list(self.high_risk))
+
+    def scatter_frame(self):
+        return pd.DataFrame(list(self.scatter), columns=['amount', 'risk_score', 'approved'])
+
+
+def live_aggregates():
+    # Session-scoped: each browser tab keeps its own watermark
+    live = st.session_state.get("live_aggregates")
+    if live is None:
+        live = st.session_state["live_aggregates"] = LiveAggregates()
+    live.update(_repository())
+    return live
+
+
+def reset_live_aggregates():
+    st.session_state.pop("live_aggregates", None)
+
+
+def auto_refresh(interval):
+    # Polls MAX(rowid) every interval seconds inside a fragment and reruns
+    # the app only when rows past the watermark exist. Returns False when
+    # this Streamlit has no fragments; the caller then falls back to a
+    # sleep-and-rerun loop.
+    fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    if fragment is None:
+        return False
+
+    @fragment(run_every=interval)
+    def poll():
+        live = st.session_state.get("live_aggregates")
+        if live is not None and _repository().get_max_rowid() > live.watermark:
+            st.rerun()
+
+    poll()
+    return True
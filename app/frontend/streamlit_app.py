@@ -3,16 +3,16 @@ import os
 import requests
 import streamlit as st
 import uuid
+import time
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-from collections import Counter
+from datetime import datetime, timedelta, timezone
 
 # Fix import path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from app.repository.transaction import TransactionRepository
+from app.frontend import dashboard_data
 
 # ---------------------------
 # CONFIG
@@ -235,8 +235,6 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-repo = TransactionRepository()
-
 # Initialize session state
 if 'verification_token' not in st.session_state:
     st.session_state.verification_token = None
@@ -247,10 +245,13 @@ if 'last_transaction' not in st.session_state:
 # FETCH REAL DATA FROM DB
 # ---------------------------
 
+# Headline figures are kept per session and only rows past the last seen
+# rowid are read on a rerun; the rest is computed in SQL and cached for
+# dashboard_data.CACHE_TTL seconds
 try:
-    customers = repo.get_unique_customers()
-    merchants = repo.get_unique_merchants()
-    all_transactions = repo.get_all_transactions()
+    customers, merchants = dashboard_data.load_directory()
+    live = dashboard_data.live_aggregates()
+    summary = live.summary
 except Exception as e:
     st.error(f"⚠️ Database connection error: {str(e)}")
     st.stop()
@@ -275,7 +276,20 @@ with st.sidebar:
     st.markdown("---")
     st.markdown(f"**Total Customers:** {len(customers)}")
     st.markdown(f"**Total Merchants:** {len(merchants)}")
-    st.markdown(f"**Total Transactions:** {len(all_transactions)}")
+    st.markdown(f"**Total Transactions:** {summary['total']:,}")
+    if st.button("🔄 Refresh Data", use_container_width=True):
+        dashboard_data.refresh()
+        dashboard_data.reset_live_aggregates()
+        st.rerun()
+    
+    live_mode = st.checkbox("📡 Live Mode", help="Refresh as new transactions arrive")
+    refresh_interval = st.select_slider(
+        "Refresh every (s)",
+        options=[1, 2, 5, 10, 30],
+        value=5,
+        disabled=not live_mode
+    )
+    live_polling = live_mode and dashboard_data.auto_refresh(refresh_interval)
     
     st.markdown("---")
     st.markdown("### 💡 How It Works")
@@ -386,7 +400,7 @@ with tab1:
                             "customer_id": customer_id,
                             "merchant_id": merchant_id,
                             "amount": amount,
-                            "timestamp": datetime.utcnow().isoformat()
+                            "timestamp": datetime.now(timezone.utc).isoformat()
                         },
                         "customer_verification_token": st.session_state.get("verification_token")
                     }
@@ -401,6 +415,7 @@ with tab1:
                         if response.status_code == 200:
                             data = response.json()
                             st.session_state.last_transaction = data
+                            dashboard_data.refresh()
                             st.rerun()
                         else:
                             st.error("❌ Authorization failed. Is the API running?")
@@ -474,19 +489,12 @@ with tab1:
 with tab2:
     st.markdown("### 📊 Merchant Revenue Insights")
     
-    transactions = all_transactions
-    
-    if transactions:
+    if summary['total']:
         # Calculate metrics
-        total_transactions = len(transactions)
-        approved_transactions = [t for t in transactions if t.get("approved") == 1]
-        declined_transactions = [t for t in transactions if t.get("approved") == 0]
-        pre_verified = [t for t in transactions if t.get("status") == "pre_verified"]
-        
-        approval_rate = (len(approved_transactions) / total_transactions * 100) if total_transactions > 0 else 0
-        total_revenue = sum(t.get("amount", 0) for t in approved_transactions)
-        total_saved = sum(t.get("revenue_saved", 0) for t in transactions)
-        avg_transaction = total_revenue / len(approved_transactions) if approved_transactions else 0
+        total_transactions = summary['total']
+        approval_rate = summary['approved'] / total_transactions * 100
+        total_revenue = summary['approved_amount']
+        total_saved = summary['revenue_saved']
         
         # Top metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -532,7 +540,7 @@ with tab2:
             # Transaction status pie chart
             status_data = pd.DataFrame({
                 'Status': ['Approved', 'Declined'],
-                'Count': [len(approved_transactions), len(declined_transactions)]
+                'Count': [summary['approved'], summary['declined']]
             })
             
             fig_status = px.pie(
@@ -553,13 +561,7 @@ with tab2:
         
         with col_chart2:
             # Risk level distribution
-            risk_levels = [t.get("risk_level", "unknown") for t in transactions]
-            risk_counter = Counter(risk_levels)
-            
-            risk_data = pd.DataFrame({
-                'Risk Level': list(risk_counter.keys()),
-                'Count': list(risk_counter.values())
-            })
+            risk_data = live.risk_levels_frame()
             
             color_map = {
                 'low': '#10b981',
@@ -589,8 +591,8 @@ with tab2:
         # Recent transactions
         st.markdown("### 📜 Recent Transactions")
         
-        # Prepare dataframe
-        df = pd.DataFrame(transactions)
+        # Latest 50 received
+        df = live.recent_frame()
         if not df.empty:
             # Select and format columns
             display_cols = []
@@ -635,23 +637,16 @@ with tab2:
 with tab3:
     st.markdown("### 🔍 Risk Monitoring Dashboard")
     
-    transactions = all_transactions
-    
-    if transactions:
+    if summary['total']:
         # Risk metrics
-        high_risk = [t for t in transactions if t.get("risk_level") in ["high", "critical"]]
-        medium_risk = [t for t in transactions if t.get("risk_level") == "medium"]
-        low_risk = [t for t in transactions if t.get("risk_level") == "low"]
-        
-        fraud_detected = [t for t in transactions if t.get("is_fraud")]
-        fraud_prevented = [t for t in fraud_detected if t.get("approved") == 0]
+        high_risk = live.high_risk_frame()
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value" style="color: #ef4444;">{len(high_risk)}</div>
+                <div class="metric-value" style="color: #ef4444;">{summary['high_risk']:,}</div>
                 <div class="metric-label">High Risk Transactions</div>
             </div>
             """, unsafe_allow_html=True)
@@ -659,7 +654,7 @@ with tab3:
         with col2:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value" style="color: #f59e0b;">{len(medium_risk)}</div>
+                <div class="metric-value" style="color: #f59e0b;">{summary['medium_risk']:,}</div>
                 <div class="metric-label">Medium Risk</div>
             </div>
             """, unsafe_allow_html=True)
@@ -667,7 +662,7 @@ with tab3:
         with col3:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value" style="color: #10b981;">{len(low_risk)}</div>
+                <div class="metric-value" style="color: #10b981;">{summary['low_risk']:,}</div>
                 <div class="metric-label">Low Risk</div>
             </div>
             """, unsafe_allow_html=True)
@@ -675,7 +670,7 @@ with tab3:
         with col4:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value" style="color: #6366f1;">{len(fraud_prevented)}</div>
+                <div class="metric-value" style="color: #6366f1;">{summary['fraud_prevented']:,}</div>
                 <div class="metric-label">Fraud Prevented</div>
             </div>
             """, unsafe_allow_html=True)
@@ -686,11 +681,13 @@ with tab3:
         col_hist, col_scatter = st.columns(2)
         
         with col_hist:
-            risk_scores = [t.get("risk_score", 0) for t in transactions]
+            # Binned in SQL; bars sit at bin centres
+            histogram = live.histogram_frame()
             
-            fig_hist = go.Figure(data=[go.Histogram(
-                x=risk_scores,
-                nbinsx=20,
+            fig_hist = go.Figure(data=[go.Bar(
+                x=histogram['risk_score'],
+                y=histogram['count'],
+                width=100 / len(histogram),
                 marker_color='#6366f1',
                 opacity=0.8
             )])
@@ -707,15 +704,15 @@ with tab3:
             st.plotly_chart(fig_hist, use_container_width=True)
         
         with col_scatter:
-            # Amount vs Risk Score
-            df_scatter = pd.DataFrame(transactions)
-            if 'amount' in df_scatter.columns and 'risk_score' in df_scatter.columns:
+            # Amount vs Risk Score, over the newest transactions only
+            df_scatter = live.scatter_frame()
+            if not df_scatter.empty:
                 fig_scatter = px.scatter(
                     df_scatter,
                     x='amount',
                     y='risk_score',
                     color='approved',
-                    title='Transaction Amount vs Risk Score',
+                    title=f'Transaction Amount vs Risk Score (latest {len(df_scatter):,})',
                     labels={'amount': 'Amount ($)', 'risk_score': 'Risk Score', 'approved': 'Approved'},
                     color_discrete_map={1: '#10b981', 0: '#ef4444'},
                     opacity=0.7
@@ -734,8 +731,8 @@ with tab3:
         # High-risk transactions table
         st.markdown("### ⚠️ High-Risk Transactions")
         
-        if high_risk:
-            df_high_risk = pd.DataFrame(high_risk)
+        if not high_risk.empty:
+            df_high_risk = high_risk
             display_cols = []
             
             if 'timestamp' in df_high_risk.columns:
@@ -776,111 +773,113 @@ with tab3:
 with tab4:
     st.markdown("### 📊 Advanced Analytics")
     
-    transactions = all_transactions
-    
-    if transactions and len(transactions) > 0:
-        df = pd.DataFrame(transactions)
-        
-        # Time-based analysis if timestamp exists
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-            df = df.dropna(subset=['timestamp'])
+    if summary['total']:
+        # Pre-bucketed series: a few hundred points whatever the history size
+        windows = {
+            "All time": None,
+            "Last 30 days": 24 * 30,
+            "Last 7 days": 24 * 7,
+            "Last 24 hours": 24,
+            "Last 6 hours": 6,
+        }
+        window = st.selectbox("📅 Period", list(windows.keys()))
+        bucket, series = dashboard_data.load_time_series(windows[window])
+        
+        if not series.empty:
+            fig_timeline = go.Figure()
             
-            if not df.empty:
-                df['date'] = df['timestamp'].dt.date
-                
-                # Transactions over time
-                daily_stats = df.groupby('date').agg({
-                    'amount': ['sum', 'count'],
-                    'approved': 'sum'
-                }).reset_index()
-                
-                daily_stats.columns = ['date', 'total_amount', 'transaction_count', 'approved_count']
-                
-                fig_timeline = go.Figure()
-                
-                fig_timeline.add_trace(go.Scatter(
-                    x=daily_stats['date'],
-                    y=daily_stats['transaction_count'],
-                    mode='lines+markers',
-                    name='Total Transactions',
-                    line=dict(color='#6366f1', width=3),
-                    marker=dict(size=8)
-                ))
-                
-                fig_timeline.add_trace(go.Scatter(
-                    x=daily_stats['date'],
-                    y=daily_stats['approved_count'],
-                    mode='lines+markers',
-                    name='Approved Transactions',
-                    line=dict(color='#10b981', width=3),
-                    marker=dict(size=8)
-                ))
-                
-                fig_timeline.update_layout(
-                    title='Transaction Trends Over Time',
-                    xaxis_title='Date',
-                    yaxis_title='Number of Transactions',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#f1f5f9'),
-                    hovermode='x unified'
-                )
-                
-                st.plotly_chart(fig_timeline, use_container_width=True)
+            fig_timeline.add_trace(go.Scatter(
+                x=series['bucket_start'],
+                y=series['transaction_count'],
+                mode='lines+markers',
+                name='Total Transactions',
+                line=dict(color='#6366f1', width=3),
+                marker=dict(size=8)
+            ))
+            
+            fig_timeline.add_trace(go.Scatter(
+                x=series['bucket_start'],
+                y=series['approved_count'],
+                mode='lines+markers',
+                name='Approved Transactions',
+                line=dict(color='#10b981', width=3),
+                marker=dict(size=8)
+            ))
+            
+            fig_timeline.add_trace(go.Scatter(
+                x=series['bucket_start'],
+                y=series['mean_risk_score'],
+                mode='lines',
+                name='Mean Risk Score',
+                line=dict(color='#f59e0b', width=2, dash='dot'),
+                yaxis='y2'
+            ))
+            
+            fig_timeline.update_layout(
+                title=f'Transaction Trends Over Time (per {bucket})',
+                xaxis_title='Time',
+                yaxis_title='Number of Transactions',
+                yaxis2=dict(title='Mean Risk Score', overlaying='y', side='right', range=[0, 100]),
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='#f1f5f9'),
+                hovermode='x unified'
+            )
+            
+            st.plotly_chart(fig_timeline, use_container_width=True)
+        else:
+            st.info("📭 No transactions in this period.")
         
         # Top merchants and customers
         col_merchants, col_customers = st.columns(2)
         
         with col_merchants:
-            if 'merchant_id' in df.columns and 'amount' in df.columns:
-                merchant_revenue = df[df['approved'] == 1].groupby('merchant_id')['amount'].sum().sort_values(ascending=False).head(10)
-                
-                fig_merchants = go.Figure(data=[go.Bar(
-                    x=merchant_revenue.values,
-                    y=merchant_revenue.index,
-                    orientation='h',
-                    marker_color='#6366f1',
-                    text=[f"${v:,.0f}" for v in merchant_revenue.values],
-                    textposition='auto'
-                )])
-                
-                fig_merchants.update_layout(
-                    title='Top 10 Merchants by Revenue',
-                    xaxis_title='Revenue ($)',
-                    yaxis_title='Merchant ID',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#f1f5f9'),
-                    height=400
-                )
-                
-                st.plotly_chart(fig_merchants, use_container_width=True)
+            merchant_revenue = dashboard_data.load_top_approved('merchant_id', 10)
+            
+            fig_merchants = go.Figure(data=[go.Bar(
+                x=merchant_revenue['amount'],
+                y=merchant_revenue['merchant_id'],
+                orientation='h',
+                marker_color='#6366f1',
+                text=[f"${v:,.0f}" for v in merchant_revenue['amount']],
+                textposition='auto'
+            )])
+            
+            fig_merchants.update_layout(
+                title='Top 10 Merchants by Revenue',
+                xaxis_title='Revenue ($)',
+                yaxis_title='Merchant ID',
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='#f1f5f9'),
+                height=400
+            )
+            
+            st.plotly_chart(fig_merchants, use_container_width=True)
         
         with col_customers:
-            if 'customer_id' in df.columns and 'amount' in df.columns:
-                customer_spending = df[df['approved'] == 1].groupby('customer_id')['amount'].sum().sort_values(ascending=False).head(10)
-                
-                fig_customers = go.Figure(data=[go.Bar(
-                    x=customer_spending.values,
-                    y=customer_spending.index,
-                    orientation='h',
-                    marker_color='#8b5cf6',
-                    text=[f"${v:,.0f}" for v in customer_spending.values],
-                    textposition='auto'
-                )])
-                
-                fig_customers.update_layout(
-                    title='Top 10 Customers by Spending',
-                    xaxis_title='Total Spending ($)',
-                    yaxis_title='Customer ID',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#f1f5f9'),
-                    height=400
-                )
-                
-                st.plotly_chart(fig_customers, use_container_width=True)
+            customer_spending = dashboard_data.load_top_approved('customer_id', 10)
+            
+            fig_customers = go.Figure(data=[go.Bar(
+                x=customer_spending['amount'],
+                y=customer_spending['customer_id'],
+                orientation='h',
+                marker_color='#8b5cf6',
+                text=[f"${v:,.0f}" for v in customer_spending['amount']],
+                textposition='auto'
+            )])
+            
+            fig_customers.update_layout(
+                title='Top 10 Customers by Spending',
+                xaxis_title='Total Spending ($)',
+                yaxis_title='Customer ID',
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='#f1f5f9'),
+                height=400
+            )
+            
+            st.plotly_chart(fig_customers, use_container_width=True)
         
         st.markdown("---")
         
@@ -890,27 +889,22 @@ with tab4:
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            avg_amount = df['amount'].mean() if 'amount' in df.columns else 0
-            st.metric("Average Transaction", f"${avg_amount:,.2f}")
-            
-            max_amount = df['amount'].max() if 'amount' in df.columns else 0
-            st.metric("Largest Transaction", f"${max_amount:,.2f}")
+            st.metric("Average Transaction", f"${summary['avg_amount']:,.2f}")
+            st.metric("Largest Transaction", f"${summary['max_amount']:,.2f}")
         
         with col2:
-            avg_risk = df['risk_score'].mean() if 'risk_score' in df.columns else 0
-            st.metric("Average Risk Score", f"{avg_risk:.1f}")
-            
-            if 'fraud_prob' in df.columns:
-                avg_fraud_prob = df['fraud_prob'].mean() * 100
-                st.metric("Avg Fraud Probability", f"{avg_fraud_prob:.1f}%")
+            st.metric("Average Risk Score", f"{summary['avg_risk_score']:.1f}")
         
         with col3:
-            if 'revenue_saved' in df.columns:
-                total_saved = df['revenue_saved'].sum()
-                st.metric("Total Revenue Saved", f"${total_saved:,.2f}")
-            
-            pre_verified_count = len(df[df['status'] == 'pre_verified']) if 'status' in df.columns else 0
-            st.metric("Pre-Verified Transactions", pre_verified_count)
+            st.metric("Total Revenue Saved", f"${summary['revenue_saved']:,.2f}")
+            st.metric("Pre-Verified Transactions", summary['pre_verified'])
     
     else:
-        st.info("📭 Insufficient data for analytics. Process more transactions to see insights.")
\ No newline at end of file
+        st.info("📭 Insufficient data for analytics. Process more transactions to see insights.")
+
+
+# Fallback auto-refresh for Streamlit versions without fragments: the
+# whole script reruns, but live figures still only read new rows
+if live_mode and not live_polling:
+    time.sleep(refresh_interval)
+    st.rerun()
@@ -1,43 +1,114 @@
-from fastapi import FastAPI
-from datetime import datetime
+import json
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from datetime import datetime, timedelta
 
 from app.model import (
     AuthorizationRequest,
     AuthorizationResponse,
+    BatchAuthorizationRequest,
+    BatchAuthorizationResponse,
     PreVerificationRequest,
-    PreVerificationResponse
+    PreVerificationResponse,
+    MerchantAnalytics,
+    SeriesBucket,
+    TimeSeriesResponse
 )
 
-from app.authorize import AuthorizationEngine
+from app.authorize import AuthorizationEngine, AsyncAuthorizationEngine
+from app.repository.transaction import to_local
+
+# Flush pending write-behind decisions before the worker exits
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    async_engine.close()
 
-app = FastAPI(title="OveRide Fraud Protection API")
 
-# Initialize the authorization engine
+app = FastAPI(title="OveRide Fraud Protection API", lifespan=lifespan)
+
+# Initialize the authorization engine; handlers go through the async
+# front, which keeps blocking SQLite work on its own executor
 auth_engine = AuthorizationEngine()
+async_engine = AsyncAuthorizationEngine(auth_engine)
 
 # Root Endpoint
 @app.get("/")
 def root():
     return {"message": "OveRide API running"}
 
-# Authorize Transaction
+# Liveness: always answers, reports seeding progress
+@app.get("/health")
+def health():
+    return {
+        "status": "ok",
+        "seeding": auth_engine.seeding_status(),
+        "write_behind": auth_engine.write_behind_status()
+    }
 
+# Readiness: 503 until any startup seeding has finished
+@app.get("/ready")
+def ready():
+    body = {
+        "ready": auth_engine.is_ready(),
+        "seeding": auth_engine.seeding_status()
+    }
+    return JSONResponse(
+        jsonable_encoder(body),
+        status_code=200 if body["ready"] else 503
+    )
+
+# Prometheus scrape endpoint: per-stage latency quantiles and state gauges
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return auth_engine.metrics.render_prometheus()
+
+# Authorize Transaction
 @app.post("/authorize", response_model=AuthorizationResponse)
-def authorize(request: AuthorizationRequest):
-    return auth_engine.authorize_transaction(request)
+async def authorize(request: AuthorizationRequest):
+    return await async_engine.authorize_transaction(request)
+
+# Authorize a micro-batch: scored together, persisted in one DB transaction
+@app.post("/authorize/batch", response_model=BatchAuthorizationResponse)
+async def authorize_batch(request: BatchAuthorizationRequest):
+    return {"results": await async_engine.authorize_batch(request.requests)}
 
 # Pre-Verify Transaction
 @app.post("/preverify", response_model=PreVerificationResponse)
-def preverify(request: PreVerificationRequest):
-    return auth_engine.pre_verify_transaction(request)
+async def preverify(request: PreVerificationRequest):
+    return await async_engine.pre_verify_transaction(request)
+
+# Time-bucketed counts, approvals, amounts and mean risk across all merchants
+@app.get("/analytics/series", response_model=TimeSeriesResponse)
+async def analytics_series(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    days: int = Query(7, ge=1, le=3650),
+    bucket: Optional[SeriesBucket] = None
+):
+    # Declared before /analytics/{merchant_id} so "series" is not taken
+    # for a merchant id. Without a bucket, the finest one that keeps the
+    # series to a few hundred points is used. Either bound may carry an
+    # offset or not; both are compared as local time, like the rollups.
+    end = to_local(end) if end else datetime.now()
+    start = to_local(start) if start else end - timedelta(days=days)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    return await async_engine.get_time_series(start, end, bucket)
 
 # Merchant Analytics
-@app.get("/analytics/{merchant_id}")
-def analytics(merchant_id: str):
-    start = datetime.now()
+@app.get("/analytics/{merchant_id}", response_model=MerchantAnalytics)
+async def analytics(merchant_id: str, days: int = Query(7, ge=1, le=3650)):
+    # The rollup is per calendar day: the last `days` of them, today included
     end = datetime.now()
+    start = (end - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
 
-    result = auth_engine.get_merchant_analytics(
+    result = await async_engine.get_merchant_analytics(
         merchant_id,
         start,
         end
@@ -45,7 +116,48 @@ def analytics(merchant_id: str):
 
     return result
 
-# Transaction History
+# Recent decisions from this worker's memory; no database access
+@app.get("/transactions/recent")
+async def recent_transactions(
+    limit: int = Query(50, ge=1, le=1000),
+    merchant_id: Optional[str] = None
+):
+    return auth_engine.get_recent_decisions(limit, merchant_id)
+
+# Transaction History: keyset pages, or NDJSON of every match with stream=true
 @app.get("/transactions")
-def transactions():
-    return auth_engine.get_transaction_history()
\ No newline at end of file
+async def transactions(
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    merchant_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    stream: bool = False
+):
+    filters = dict(
+        customer_id=customer_id,
+        merchant_id=merchant_id,
+        start=start,
+        end=end
+    )
+
+    try:
+        if stream:
+            rows = auth_engine.stream_transaction_history(cursor=cursor, **filters)
+            # Pull the first row now so a bad cursor is a 400, not a broken
+            # stream; Starlette iterates the rest off the event loop
+            first = await async_engine.run(next, rows, None)
+        else:
+            return await async_engine.get_transaction_history(limit, cursor, **filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    def ndjson():
+        if first is None:
+            return
+        yield json.dumps(jsonable_encoder(first)) + "\n"
+        for row in rows:
+            yield json.dumps(jsonable_encoder(row)) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Literal, Optional, List, Union
 from enum import Enum
 
 class RiskLevel(str, Enum):
@@ -77,6 +77,18 @@ class AuthorizationResponse(BaseModel):
     processing_time_ms: float
     revenue_saved: float = Field(0.0, description="Amount of revenue saved by approving via pre-verification")
 
+class BatchAuthorizationRequest(BaseModel):
+    requests: List[AuthorizationRequest] = Field(min_length=1, max_length=1000)
+
+class BatchItemError(BaseModel):
+    transaction_id: str
+    error: str
+
+class BatchAuthorizationResponse(BaseModel):
+    results: List[Union[AuthorizationResponse, BatchItemError]] = Field(
+        description="One result per request, in request order: the decision, or why the item was not processed"
+    )
+
 class PreVerificationRequest(BaseModel):
     customer_id: str
     amount: float
@@ -100,4 +112,19 @@ class MerchantAnalytics(BaseModel):
     fraud_prevented_count: int
     revenue_saved: float = Field(description="Total revenue saved from pre-verified high-risk transactions")
     approval_rate: float = Field(description="Percentage of approved transactions")
-    avg_risk_score: float
\ No newline at end of file
+    avg_risk_score: float
+
+SeriesBucket = Literal["minute", "hour", "day", "week", "month"]
+
+class TimeSeriesPoint(BaseModel):
+    bucket_start: datetime
+    count: int
+    approved_count: int
+    amount_sum: float
+    mean_risk_score: float
+
+class TimeSeriesResponse(BaseModel):
+    bucket: SeriesBucket
+    period_start: datetime
+    period_end: datetime
+    points: List[TimeSeriesPoint] = Field(description="Non-empty buckets only, oldest first")
\ No newline at end of file
@@ -0,0 +1,115 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    # Long-lived sqlite3 connections shared across threads. Each connection
+    # keeps its own prepared-statement cache, so reusing connections (and
+    # constant SQL strings) means statements are compiled once, not per call.
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 8,
+        busy_timeout_ms: int = 5000,
+        acquire_timeout: float = 10.0,
+        cached_statements: int = 256
+    ):
+        self.db_path = db_path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.acquire_timeout = acquire_timeout
+        self.cached_statements = cached_statements
+
+        # LIFO hands out the most recently used (warmest) connection first
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._all = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across app crashes in WAL mode; only an OS crash
+        # can lose the last commits
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                conn = self._connect()
+                self._created += 1
+                self._all.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise PoolTimeout(
+                f"No SQLite connection free after {self.acquire_timeout}s "
+                f"(pool size {self.size})"
+            ) from None
+
+    @contextmanager
+    def connection(self):
+        # Commits on clean exit, rolls back on error, always returns the
+        # connection to the pool
+        conn = self._acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "created": self._created,
+            "idle": self._idle.qsize(),
+        }
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all = []
+            self._created = 0
+            self._idle = queue.LifoQueue(maxsize=self.size)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, **options) -> ConnectionPool:
+    # One pool per database file per process; options only apply when the
+    # pool is first created
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path, **options)
+            _pools[db_path] = pool
+        return pool
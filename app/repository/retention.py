@@ -0,0 +1,224 @@
+import argparse
+import os
+from datetime import datetime
+
+from app.repository.transaction import (
+    DB_PATH,
+    TIME_ROLLUP_PREFIX,
+    TRANSACTION_COLUMNS,
+    TransactionRepository,
+    archive_tables,
+    from_epoch_us,
+    rebuild_union_view,
+    to_epoch_us,
+)
+
+# Calendar months (counting the current one) kept row by row in the hot
+# transactions table; anything older is archived or dropped
+RETENTION_MONTHS = int(os.environ.get("OVERIDE_RETENTION_MONTHS", 3))
+
+MODES = ("archive", "drop")
+
+# Rows moved per transaction. Each commit rewrites the randomly placed
+# primary key and customer index pages it touched, so bigger batches move
+# rows faster; smaller ones hold the write lock for less time.
+RETENTION_BATCH_ROWS = 20_000
+
+# Page cache for the job's connection while it runs. Deletes hit the
+# customer, merchant and primary key indexes in random order, and the
+# default 2 MB cache makes that several times slower.
+RETENTION_CACHE_KIB = 256 * 1024
+
+ARCHIVE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        transaction_id TEXT PRIMARY KEY,
+        customer_id TEXT,
+        merchant_id TEXT,
+        amount REAL,
+        risk_score REAL,
+        risk_level TEXT,
+        approved INTEGER,
+        message TEXT,
+        revenue_saved REAL,
+        timestamp TEXT,
+        status TEXT,
+        ts_us INTEGER
+    )
+"""
+
+# Cold months are read rarely and by time or customer; no merchant index
+ARCHIVE_INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_{table}_ts_us ON {table}(ts_us)",
+    "CREATE INDEX IF NOT EXISTS idx_{table}_customer_ts_us ON {table}(customer_id, ts_us)",
+]
+
+
+def archive_table_name(month: datetime) -> str:
+    return f"transactions_{month:%Y_%m}"
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def retention_cutoff(months=RETENTION_MONTHS, now=None) -> datetime:
+    # Local midnight on the first day of the oldest month that stays hot
+    now = now or datetime.now()
+    month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return _add_months(month, 1 - max(1, months))
+
+
+def _create_archive_table(conn, table):
+    conn.execute(ARCHIVE_TABLE_SQL.format(table=table))
+    for sql in ARCHIVE_INDEX_SQL:
+        conn.execute(sql.format(table=table))
+
+
+def _move_month(conn, month, keep_rowid, mode, dry_run, batch_rows):
+    # The month goes over in ts_us slices of about batch_rows rows, one
+    # transaction each, so authorizations keep committing in between
+    low, end = to_epoch_us(month), to_epoch_us(_add_months(month, 1))
+    table = archive_table_name(month)
+    columns = ", ".join(TRANSACTION_COLUMNS)
+    where = "ts_us >= ? AND ts_us < ? AND rowid < ?"
+
+    if dry_run:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM transactions WHERE {where}", (low, end, keep_rowid)
+        ).fetchone()[0]
+
+    moved = 0
+    while low < end:
+        boundary = conn.execute(
+            "SELECT ts_us FROM transactions WHERE ts_us >= ? AND ts_us < ? "
+            "ORDER BY ts_us LIMIT 1 OFFSET ?",
+            (low, end, batch_rows)
+        ).fetchone()
+        high = boundary[0] if boundary and boundary[0] > low else end
+        params = (low, high, keep_rowid)
+        if mode == "archive":
+            _create_archive_table(conn, table)
+            conn.execute(
+                f"INSERT INTO {table} ({columns}) "
+                f"SELECT {columns} FROM transactions WHERE {where}",
+                params
+            )
+        moved += conn.execute(f"DELETE FROM transactions WHERE {where}", params).rowcount
+        conn.commit()
+        low = high
+    return moved
+
+
+def _compact_time_rollup(conn, cutoff):
+    # Minute buckets only serve ranges of a few hours; past the cutoff the
+    # hour rows are enough. merchant_daily_rollup is already per merchant
+    # and day, so it is kept as is.
+    width = TIME_ROLLUP_PREFIX["minute"]
+    return conn.execute(
+        "DELETE FROM time_rollup WHERE granularity = 'minute' AND bucket < ?",
+        (cutoff.isoformat()[:width],)
+    ).rowcount
+
+
+def apply_retention(
+    db_path=DB_PATH,
+    months=RETENTION_MONTHS,
+    mode="archive",
+    dry_run=False,
+    batch_rows=RETENTION_BATCH_ROWS,
+    now=None,
+    on_month=None
+):
+    # Moves every row older than the cutoff out of the hot table, a month
+    # at a time: into transactions_YYYY_MM ("archive") or nowhere ("drop").
+    # Rollups already hold those rows' aggregates, so analytics and time
+    # series over old months are unaffected either way.
+    if mode not in MODES:
+        raise ValueError(f"Unknown retention mode: {mode!r}")
+
+    repo = TransactionRepository(db_path=db_path)
+    # Months are cut by ts_us, so a legacy database is backfilled first
+    repo.backfill_epoch()
+    cutoff = retention_cutoff(months, now)
+    with repo.pool.connection() as conn:
+        # The newest row always stays: SQLite hands out MAX(rowid) + 1 as
+        # the next rowid, and the dashboard and snapshot watermarks rely on
+        # rowids never going backwards
+        first_us, keep_rowid = conn.execute(
+            "SELECT MIN(ts_us), MAX(rowid) FROM transactions"
+        ).fetchone()
+
+    result = {"cutoff": cutoff, "mode": mode, "months": {}, "minute_buckets": 0}
+    if first_us is None or first_us >= to_epoch_us(cutoff):
+        return result
+
+    first = from_epoch_us(first_us)
+    month = first.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    with repo.pool.connection() as conn:
+        previous_cache = conn.execute("PRAGMA cache_size").fetchone()[0]
+        conn.execute(f"PRAGMA cache_size=-{RETENTION_CACHE_KIB}")
+        try:
+            while month < cutoff:
+                moved = _move_month(conn, month, keep_rowid, mode, dry_run, batch_rows)
+                if moved:
+                    result["months"][f"{month:%Y-%m}"] = moved
+                    if on_month:
+                        on_month(month, moved)
+                month = _add_months(month, 1)
+
+            if not dry_run:
+                result["minute_buckets"] = _compact_time_rollup(conn, cutoff)
+                rebuild_union_view(conn)
+        finally:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute(f"PRAGMA cache_size={previous_cache}")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Move transactions older than the retention window out of the hot table."
+    )
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument(
+        "--months",
+        type=int,
+        default=RETENTION_MONTHS,
+        help="calendar months kept in the hot table, the current one included"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=MODES,
+        default="archive",
+        help="archive: monthly transactions_YYYY_MM tables; drop: keep only the rollups"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="report what would move")
+    args = parser.parse_args(argv)
+
+    verb = "would move" if args.dry_run else ("archived" if args.mode == "archive" else "dropped")
+    result = apply_retention(
+        args.db,
+        months=args.months,
+        mode=args.mode,
+        dry_run=args.dry_run,
+        on_month=lambda month, rows: print(f"{month:%Y-%m}: {verb} {rows:,} rows")
+    )
+
+    if not result["months"]:
+        print(f"Nothing older than {result['cutoff']:%Y-%m-%d}")
+        return
+    print(
+        f"{sum(result['months'].values()):,} rows older than "
+        f"{result['cutoff']:%Y-%m-%d} {verb}"
+    )
+    if not args.dry_run:
+        print(f"{result['minute_buckets']:,} minute rollup buckets compacted")
+        repo = TransactionRepository(db_path=args.db)
+        with repo.pool.connection() as conn:
+            print(f"Archive tables: {', '.join(archive_tables(conn)) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
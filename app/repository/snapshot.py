@@ -0,0 +1,352 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.repository.transaction import DB_PATH, TransactionRepository
+
+# Optional: only this export needs pyarrow, the API does not
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Rows per record batch (Arrow) or row group (Parquet)
+EXPORT_CHUNK_SIZE = 100_000
+
+MANIFEST_FILE = "_watermark.json"
+
+# Bumped when the part schema changes; older snapshots need --rebuild
+SNAPSHOT_VERSION = 2
+
+FORMATS = {"arrow": "arrow", "parquet": "parquet"}
+
+# Column order read from SQLite; rowid is kept so parts can be joined back
+# to the live table and appends resume where the last one stopped. The
+# timestamp field is built from ts_us, so no ISO text is parsed.
+COLUMNS = (
+    "rowid",
+    "transaction_id",
+    "customer_id",
+    "merchant_id",
+    "amount",
+    "risk_score",
+    "risk_level",
+    "approved",
+    "status",
+    "revenue_saved",
+    "ts_us",
+    "message",
+)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError(
+            "Columnar snapshots need pyarrow, which is not installed: "
+            "pip install -r requirements-optional.txt"
+        )
+
+
+def snapshot_schema():
+    _require_pyarrow()
+    return pa.schema([
+        ("rowid", pa.int64()),
+        ("transaction_id", pa.string()),
+        ("customer_id", pa.dictionary(pa.int32(), pa.string())),
+        ("merchant_id", pa.dictionary(pa.int32(), pa.string())),
+        ("amount", pa.float64()),
+        ("risk_score", pa.float64()),
+        ("risk_level", pa.dictionary(pa.int8(), pa.string())),
+        ("approved", pa.int8()),
+        ("status", pa.dictionary(pa.int8(), pa.string())),
+        ("revenue_saved", pa.float64()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("message", pa.string()),
+    ])
+
+
+class _DictionaryEncoder:
+    # Codes stay fixed for a whole part file, so each batch's dictionary
+    # only extends the previous one and the Arrow writer emits deltas
+    # instead of repeating it
+
+    def __init__(self, index_type):
+        self.index_type = index_type
+        self.codes = {}
+        self.values = []
+
+    def encode(self, values):
+        codes, dictionary = self.codes, self.values
+        indices = np.empty(len(values), dtype=np.int64)
+        missing = np.zeros(len(values), dtype=bool)
+        for i, value in enumerate(values):
+            if value is None:
+                missing[i] = True
+                indices[i] = 0
+                continue
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            indices[i] = code
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=self.index_type, mask=missing),
+            pa.array(dictionary, type=pa.string())
+        )
+
+
+def _record_batch(rows, encoders, schema):
+    (rowid, transaction_id, customer_id, merchant_id, amount, risk_score,
+     risk_level, approved, status, revenue_saved, ts_us, message) = zip(*rows)
+
+    return pa.record_batch([
+        pa.array(rowid, type=pa.int64()),
+        pa.array(transaction_id, type=pa.string()),
+        encoders["customer_id"].encode(customer_id),
+        encoders["merchant_id"].encode(merchant_id),
+        pa.array(amount, type=pa.float64()),
+        pa.array(risk_score, type=pa.float64()),
+        encoders["risk_level"].encode(risk_level),
+        pa.array(approved, type=pa.int8()),
+        encoders["status"].encode(status),
+        pa.array(revenue_saved, type=pa.float64()),
+        pa.array(ts_us, type=pa.int64()).cast(pa.timestamp("us", tz="UTC")),
+        pa.array(message, type=pa.string()),
+    ], schema=schema)
+
+
+# ------------------------
+# MANIFEST
+# ------------------------
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_manifest(out_dir, manifest):
+    # Temp file and rename, so a crash mid-export leaves the previous
+    # manifest (and the parts it lists) intact
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ------------------------
+# EXPORT
+# ------------------------
+def _open_writer(path, fmt, schema):
+    # (writer, sink); Parquet manages its own file
+    if fmt == "parquet":
+        return pq.ParquetWriter(path, schema, compression="zstd"), None
+    sink = pa.OSFile(path, "wb")
+    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    writer = pa.ipc.new_file(sink, schema, options=options)
+    return writer, sink
+
+
+def export_snapshot(
+    out_dir,
+    db_path=DB_PATH,
+    fmt="arrow",
+    chunk_size=EXPORT_CHUNK_SIZE,
+    rebuild=False,
+    on_progress=None
+):
+    # Appends every row past the manifest's last_rowid as one new part
+    # file. The upper bound is fixed before reading, so a part is a
+    # consistent cut even while the API keeps writing.
+    _require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown snapshot format: {fmt!r}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    if rebuild and manifest is not None:
+        for part in manifest["parts"]:
+            path = os.path.join(out_dir, part["file"])
+            if os.path.exists(path):
+                os.remove(path)
+        manifest = None
+    if manifest is None:
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "format": fmt,
+            "last_rowid": 0,
+            "rows": 0,
+            "parts": [],
+        }
+    elif manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"{out_dir} was written with an older snapshot schema; pass rebuild=True"
+        )
+    elif manifest["format"] != fmt:
+        raise ValueError(
+            f"{out_dir} holds a {manifest['format']} snapshot; "
+            "append in that format or pass rebuild=True"
+        )
+
+    repo = TransactionRepository(db_path=db_path)
+    # Parts carry ts_us, so a legacy database is backfilled first
+    repo.backfill_epoch()
+    upper = repo.get_max_rowid()
+    if upper <= manifest["last_rowid"]:
+        return {"rows": 0, "part": None, "last_rowid": manifest["last_rowid"]}
+
+    schema = snapshot_schema()
+    part_name = f"part-{len(manifest['parts']) + 1:06d}.{FORMATS[fmt]}"
+    part_path = os.path.join(out_dir, part_name)
+    tmp_path = f"{part_path}.tmp"
+
+    encoders = {
+        "customer_id": _DictionaryEncoder(pa.int32()),
+        "merchant_id": _DictionaryEncoder(pa.int32()),
+        "risk_level": _DictionaryEncoder(pa.int8()),
+        "status": _DictionaryEncoder(pa.int8()),
+    }
+
+    started = time.perf_counter()
+    written = 0
+    first_rowid = last_rowid = None
+    writer, sink = _open_writer(tmp_path, fmt, schema)
+    try:
+        for rows in repo.iter_row_chunks(
+            COLUMNS,
+            after_rowid=manifest["last_rowid"],
+            up_to_rowid=upper,
+            chunk_size=chunk_size
+        ):
+            batch = _record_batch(rows, encoders, schema)
+            if fmt == "parquet":
+                writer.write_batch(batch, row_group_size=chunk_size)
+            else:
+                writer.write_batch(batch)
+            if first_rowid is None:
+                first_rowid = rows[0][0]
+            last_rowid = rows[-1][0]
+            written += len(rows)
+            if on_progress:
+                on_progress(written)
+    finally:
+        writer.close()
+        if sink is not None:
+            sink.close()
+
+    if not written:
+        os.remove(tmp_path)
+        return {"rows": 0, "part": None, "last_rowid": manifest["last_rowid"]}
+
+    os.replace(tmp_path, part_path)
+    manifest["parts"].append({
+        "file": part_name,
+        "rows": written,
+        "first_rowid": first_rowid,
+        "last_rowid": last_rowid,
+        "exported_at": datetime.now().isoformat(),
+    })
+    manifest["last_rowid"] = last_rowid
+    manifest["rows"] += written
+    _save_manifest(out_dir, manifest)
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": written,
+        "part": part_name,
+        "last_rowid": last_rowid,
+        "seconds": seconds,
+        "rows_per_sec": written / seconds if seconds else 0.0,
+    }
+
+
+# ------------------------
+# READ
+# ------------------------
+def read_snapshot(out_dir, columns=None):
+    # All parts as one pyarrow Table. Arrow parts are memory-mapped, so
+    # columns are paged in from disk on access rather than copied. Each
+    # part (and each batch) carries its own dictionaries; they are unified
+    # so group-bys and joins on the encoded columns work across parts.
+    _require_pyarrow()
+    manifest = load_manifest(out_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No snapshot manifest in {out_dir}")
+
+    tables = []
+    for part in manifest["parts"]:
+        path = os.path.join(out_dir, part["file"])
+        if manifest["format"] == "parquet":
+            tables.append(pq.read_table(path, columns=columns, memory_map=True))
+            continue
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        tables.append(table.select(columns) if columns else table)
+
+    if not tables:
+        schema = snapshot_schema()
+        if columns:
+            schema = pa.schema([schema.field(name) for name in columns])
+        return schema.empty_table()
+    return pa.concat_tables(tables).unify_dictionaries()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export the transactions table to columnar snapshot files."
+    )
+    parser.add_argument("out_dir", nargs="?", default="snapshots")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--format", choices=sorted(FORMATS), default="arrow")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Discard existing parts and export the whole table again"
+    )
+    parser.add_argument(
+        "--info",
+        action="store_true",
+        help="Summarize the existing snapshot instead of exporting"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        if args.info:
+            table = read_snapshot(args.out_dir)
+            manifest = load_manifest(args.out_dir)
+            print(
+                f"{table.num_rows:,} rows in {len(manifest['parts'])} "
+                f"{manifest['format']} part(s), last rowid {manifest['last_rowid']}"
+            )
+            print(table.schema)
+            return
+
+        stats = export_snapshot(
+            args.out_dir,
+            db_path=args.db,
+            fmt=args.format,
+            chunk_size=args.chunk_size,
+            rebuild=args.rebuild,
+            on_progress=lambda rows: print(f"\r{rows:,} rows", end="", flush=True)
+        )
+    except (RuntimeError, ValueError, FileNotFoundError) as e:
+        raise SystemExit(str(e))
+
+    if not stats["rows"]:
+        print(f"Snapshot already current (last rowid {stats['last_rowid']})")
+        return
+    print(
+        f"\nWrote {stats['rows']:,} rows to {stats['part']} in "
+        f"{stats['seconds']:.1f}s ({stats['rows_per_sec']:,.0f} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,555 @@
+import base64
+import json
+import os
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+
+from app.repository.pool import get_pool
 
 DB_PATH = "transactions.db"
 
+POOL_SIZE = int(os.environ.get("OVERIDE_DB_POOL_SIZE", 8))
+BUSY_TIMEOUT_MS = int(os.environ.get("OVERIDE_DB_BUSY_TIMEOUT_MS", 5000))
+
+# Rows per executemany() call when bulk loading
+BULK_CHUNK_SIZE = 10_000
+
+# Rows per committed batch when backfilling ts_us on an existing database
+BACKFILL_BATCH_SIZE = 50_000
+
+# Seconds the background backfill sleeps between batches, so live writers
+# get the lock in between (the busy handler polls every 100ms at most)
+BACKFILL_PAUSE = 0.1
+
+# A startup seed claim its owner has not refreshed for this long is taken to
+# belong to a process that died mid-seed, and may be claimed again
+SEED_CLAIM_TTL = 15 * 60
+
+# Row tuple order for INSERT_SQL, also the column list of archive tables
+# and the transactions_all view
+TRANSACTION_COLUMNS = (
+    "transaction_id", "customer_id", "merchant_id", "amount", "risk_score",
+    "risk_level", "approved", "message", "revenue_saved", "timestamp", "status", "ts_us"
+)
+
+INSERT_SQL = f"""
+    INSERT INTO transactions ({", ".join(TRANSACTION_COLUMNS)})
+    VALUES ({", ".join("?" * len(TRANSACTION_COLUMNS))})
+"""
+
+# Row tuple positions used when folding rows into rollups
+_MERCHANT, _AMOUNT, _RISK_SCORE, _APPROVED = 2, 3, 4, 6
+_REVENUE_SAVED, _TIMESTAMP, _STATUS = 8, 9, 10
+
+# Declined at or above this score counts as fraud prevented (RiskEngine's
+# is_fraud threshold)
+FRAUD_SCORE = 70
+
+_MERGE_ROLLUP = """
+    ON CONFLICT (merchant_id, day) DO UPDATE SET
+        total = total + excluded.total,
+        approved = approved + excluded.approved,
+        declined = declined + excluded.declined,
+        pre_verified = pre_verified + excluded.pre_verified,
+        fraud_prevented = fraud_prevented + excluded.fraud_prevented,
+        revenue_saved = revenue_saved + excluded.revenue_saved,
+        risk_score_sum = risk_score_sum + excluded.risk_score_sum
+"""
+
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO merchant_daily_rollup (
+        merchant_id, day, total, approved, declined, pre_verified,
+        fraud_prevented, revenue_saved, risk_score_sum
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+""" + _MERGE_ROLLUP
+
+# Folds every row past a rowid into the rollup with one GROUP BY. Rows
+# moved out by the retention job are no longer in transactions, so the
+# rollups are only ever added to, never rebuilt from the hot table.
+MERGE_ROLLUP_SQL = f"""
+    INSERT INTO merchant_daily_rollup
+    SELECT
+        merchant_id,
+        substr(timestamp, 1, 10),
+        COUNT(*),
+        SUM(status = 'approved'),
+        SUM(status = 'declined'),
+        SUM(status = 'pre_verified'),
+        SUM(status = 'declined' AND risk_score >= {FRAUD_SCORE}),
+        SUM(revenue_saved),
+        SUM(risk_score)
+    FROM transactions
+    WHERE rowid > ?
+    GROUP BY merchant_id, substr(timestamp, 1, 10)
+""" + _MERGE_ROLLUP
+
+# Whole-table time rollup. Buckets are ISO timestamp prefixes: minute rows
+# serve short ranges, hour rows serve hour and (summed) day series.
+TIME_ROLLUP_PREFIX = {"minute": 16, "hour": 13}
+
+# Aim for at most this many points per series when the bucket is automatic
+MAX_SERIES_POINTS = 500
+
+_MERGE_TIME_ROLLUP = """
+    ON CONFLICT (granularity, bucket) DO UPDATE SET
+        total = total + excluded.total,
+        approved = approved + excluded.approved,
+        amount_sum = amount_sum + excluded.amount_sum,
+        risk_score_sum = risk_score_sum + excluded.risk_score_sum
+"""
+
+UPSERT_TIME_ROLLUP_SQL = """
+    INSERT INTO time_rollup (
+        granularity, bucket, total, approved, amount_sum, risk_score_sum
+    ) VALUES (?, ?, ?, ?, ?, ?)
+""" + _MERGE_TIME_ROLLUP
+
+MERGE_TIME_ROLLUP_SQL = [
+    f"""
+    INSERT INTO time_rollup
+    SELECT
+        '{granularity}',
+        substr(timestamp, 1, {width}),
+        COUNT(*),
+        SUM(approved = 1),
+        SUM(amount),
+        SUM(risk_score)
+    FROM transactions
+    WHERE rowid > ?
+    GROUP BY substr(timestamp, 1, {width})
+    """ + _MERGE_TIME_ROLLUP
+    for granularity, width in TIME_ROLLUP_PREFIX.items()
+]
+
+
+# ------------------------
+# SCHEMA MIGRATIONS
+# ------------------------
+# Applied in order on startup; PRAGMA user_version records how many have
+# run, so existing databases pick up new ones exactly once.
+def _migration_secondary_indexes(conn):
+    # (merchant_id, timestamp) also serves plain merchant_id lookups and
+    # DISTINCT merchant_id, so no separate single-column index is needed
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_customer_ts "
+        "ON transactions(customer_id, timestamp)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_merchant_ts "
+        "ON transactions(merchant_id, timestamp)"
+    )
+
+
+def _migration_status_column(conn):
+    # Decision status was previously only implied by approved + message
+    conn.execute("ALTER TABLE transactions ADD COLUMN status TEXT")
+    conn.execute("""
+        UPDATE transactions SET status = CASE
+            WHEN approved = 0 THEN 'declined'
+            WHEN message LIKE '%pre-verification%' THEN 'pre_verified'
+            ELSE 'approved'
+        END
+    """)
+
+
+def _migration_merchant_rollup(conn):
+    # Per-merchant, per-day counters kept up to date on every write so
+    # analytics over any window sums a handful of rows
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS merchant_daily_rollup (
+            merchant_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            approved INTEGER NOT NULL DEFAULT 0,
+            declined INTEGER NOT NULL DEFAULT 0,
+            pre_verified INTEGER NOT NULL DEFAULT 0,
+            fraud_prevented INTEGER NOT NULL DEFAULT 0,
+            revenue_saved REAL NOT NULL DEFAULT 0,
+            risk_score_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (merchant_id, day)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("DELETE FROM merchant_daily_rollup")
+    conn.execute(MERGE_ROLLUP_SQL, (0,))
+
+
+def _migration_timestamp_index(conn):
+    # Backs unfiltered newest-first keyset pages (rowid is implicit in
+    # every index, so ORDER BY timestamp, rowid is index order)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_ts "
+        "ON transactions(timestamp)"
+    )
+
+
+def _migration_time_rollup(conn):
+    # Minute and hour counters across all merchants for the time series
+    # endpoint, maintained alongside merchant_daily_rollup
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS time_rollup (
+            granularity TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            approved INTEGER NOT NULL DEFAULT 0,
+            amount_sum REAL NOT NULL DEFAULT 0,
+            risk_score_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (granularity, bucket)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("DELETE FROM time_rollup")
+    for sql in MERGE_TIME_ROLLUP_SQL:
+        conn.execute(sql, (0,))
+
+
+def _migration_epoch_column(conn):
+    # Integer epoch microseconds (UTC) for ordering and range filters. The
+    # ISO text indexes it replaces compared strings, and strings written
+    # with different offsets (or none) did not sort in time order. Existing
+    # rows are filled in afterwards by backfill_epoch, in short batches off
+    # the startup path, and EPOCH_INDEX_SQL is built once they are.
+    conn.execute("ALTER TABLE transactions ADD COLUMN ts_us INTEGER")
+    conn.execute("DROP INDEX IF EXISTS idx_transactions_customer_ts")
+    conn.execute("DROP INDEX IF EXISTS idx_transactions_merchant_ts")
+    conn.execute("DROP INDEX IF EXISTS idx_transactions_ts")
+
+
+# Created after the backfill: one bulk build is several times cheaper than
+# moving every backfilled row within three live indexes
+EPOCH_INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_transactions_customer_ts_us "
+    "ON transactions(customer_id, ts_us)",
+    "CREATE INDEX IF NOT EXISTS idx_transactions_merchant_ts_us "
+    "ON transactions(merchant_id, ts_us)",
+    "CREATE INDEX IF NOT EXISTS idx_transactions_ts_us "
+    "ON transactions(ts_us)",
+]
+
+
+def _migration_union_view(conn):
+    # transactions_all starts out as the hot table alone; the retention
+    # job adds each monthly archive table to it
+    rebuild_union_view(conn)
+
+
+def _migration_seed_claim(conn):
+    # One row while a worker process seeds an empty database, so the other
+    # workers neither seed it again nor report ready before it is done
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS seed_claim (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            claimed_at REAL NOT NULL,
+            finished_at REAL
+        )
+    """)
+
+
+MIGRATIONS = [
+    _migration_secondary_indexes,
+    _migration_status_column,
+    _migration_merchant_rollup,
+    _migration_timestamp_index,
+    _migration_time_rollup,
+    _migration_epoch_column,
+    _migration_union_view,
+    _migration_seed_claim,
+]
+
+
+# ------------------------
+# PARTITIONS
+# ------------------------
+# transactions is the hot partition every write goes to. The retention job
+# (app.repository.retention) moves old months into transactions_YYYY_MM
+# tables; transactions_all is the UNION ALL of all of them. A migration
+# that adds a column must also add it to TRANSACTION_COLUMNS and the
+# archive tables, and rebuild the view.
+ARCHIVE_TABLE_GLOB = "transactions_[0-9][0-9][0-9][0-9]_[0-9][0-9]"
+
+
+def archive_tables(conn):
+    cursor = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ? ORDER BY name",
+        (ARCHIVE_TABLE_GLOB,)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def rebuild_union_view(conn):
+    columns = ", ".join(TRANSACTION_COLUMNS)
+    selects = [
+        f"SELECT {columns} FROM {table}"
+        for table in ["transactions", *archive_tables(conn)]
+    ]
+    # Dropped and recreated in one transaction, so concurrent readers never
+    # find the view missing. sqlite3 does not BEGIN implicitly for DDL;
+    # a transaction the caller already has open is joined instead.
+    own = not conn.in_transaction
+    if own:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DROP VIEW IF EXISTS transactions_all")
+        conn.execute(f"CREATE VIEW transactions_all AS {' UNION ALL '.join(selects)}")
+    except BaseException:
+        if own:
+            conn.rollback()
+        raise
+    if own:
+        conn.commit()
+
+
+# ------------------------
+# TIMESTAMPS
+# ------------------------
+# ts_us is the instant; the timestamp text column keeps local wall-clock
+# ISO time for display and the rollup bucket keys. Naive datetimes are
+# taken as local time, as in app.state.velocity.
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_HOUR_US = 3_600_000_000
+
+
+@lru_cache(maxsize=4096)
+def _local_offset_us(hour: int) -> int:
+    # UTC offset of local time during a wall-clock hour counted from the
+    # epoch. Looking it up per hour instead of per call keeps the tz
+    # database out of the write path.
+    wall = _NAIVE_EPOCH + timedelta(hours=hour)
+    return wall.astimezone().utcoffset() // _MICROSECOND
+
+
+def to_epoch_us(timestamp: datetime) -> int:
+    if timestamp.tzinfo is not None:
+        return (timestamp - _EPOCH) // _MICROSECOND
+    wall_us = (timestamp - _NAIVE_EPOCH) // _MICROSECOND
+    return wall_us - _local_offset_us(wall_us // _HOUR_US)
+
+
+def from_epoch_us(ts_us: int) -> datetime:
+    # Naive local time, the form the rest of the app works in
+    return (_EPOCH + ts_us * _MICROSECOND).astimezone().replace(tzinfo=None)
+
+
+def to_local(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone().replace(tzinfo=None)
+
+
+def _iso_epoch_us(text):
+    # SQL function for the backfill; unparseable text stays NULL
+    try:
+        return to_epoch_us(datetime.fromisoformat(text))
+    except (TypeError, ValueError):
+        return None
+
+
+# Stands in for ts_us in reads until the backfill has filled the column
+TS_US_FALLBACK = "COALESCE(ts_us, iso_epoch_us(timestamp))"
+
+
+def _register_functions(conn, ts=TS_US_FALLBACK):
+    # Only when the SQL needs it: redefining a function expires every
+    # prepared statement cached on the connection
+    if ts == TS_US_FALLBACK:
+        conn.create_function("iso_epoch_us", 1, _iso_epoch_us, deterministic=True)
+
+
+def _local_wall_to_epoch_us(wall_us):
+    # Vectorized to_epoch_us for the naive local datetime64 values in seed
+    # columns: one offset lookup per distinct hour in the chunk
+    hours, inverse = np.unique(wall_us // _HOUR_US, return_inverse=True)
+    offsets = np.array([_local_offset_us(int(hour)) for hour in hours], dtype=np.int64)
+    return wall_us - offsets[inverse]
+
+
+def _rollup_deltas(rows):
+    # Fold transaction row tuples into one UPSERT_ROLLUP_SQL row per
+    # (merchant, day)
+    deltas = {}
+    for row in rows:
+        key = (row[_MERCHANT], row[_TIMESTAMP][:10])
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = [0, 0, 0, 0, 0, 0.0, 0.0]
+        status = row[_STATUS]
+        delta[0] += 1
+        delta[1] += status == "approved"
+        delta[2] += status == "declined"
+        delta[3] += status == "pre_verified"
+        delta[4] += status == "declined" and row[_RISK_SCORE] >= FRAUD_SCORE
+        delta[5] += row[_REVENUE_SAVED] or 0.0
+        delta[6] += row[_RISK_SCORE] or 0.0
+    return [key + tuple(delta) for key, delta in deltas.items()]
+
+
+def _time_rollup_deltas(rows):
+    # One UPSERT_TIME_ROLLUP_SQL row per (granularity, bucket)
+    deltas = {}
+    for row in rows:
+        for granularity, width in TIME_ROLLUP_PREFIX.items():
+            key = (granularity, row[_TIMESTAMP][:width])
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = [0, 0, 0.0, 0.0]
+            delta[0] += 1
+            delta[1] += row[_APPROVED] == 1
+            delta[2] += row[_AMOUNT] or 0.0
+            delta[3] += row[_RISK_SCORE] or 0.0
+    return [key + tuple(delta) for key, delta in deltas.items()]
+
+
+def _apply_rollups(conn, rows):
+    conn.executemany(UPSERT_ROLLUP_SQL, _rollup_deltas(rows))
+    conn.executemany(UPSERT_TIME_ROLLUP_SQL, _time_rollup_deltas(rows))
+
+
+def _shift_rollups(conn, old_rows, new_rows):
+    # Moves rows' rollup contributions from the buckets of old_rows to those
+    # of new_rows, the same rows with a rewritten timestamp. Both delta
+    # tuples lead with a two-part key.
+    for deltas, sql in (
+        (_rollup_deltas, UPSERT_ROLLUP_SQL),
+        (_time_rollup_deltas, UPSERT_TIME_ROLLUP_SQL),
+    ):
+        conn.executemany(sql, [
+            (*delta[:2], *(-value for value in delta[2:]))
+            for delta in deltas(old_rows)
+        ])
+        conn.executemany(sql, deltas(new_rows))
+
+
+def _merge_rollups(conn, after_rowid):
+    conn.execute(MERGE_ROLLUP_SQL, (after_rowid,))
+    for sql in MERGE_TIME_ROLLUP_SQL:
+        conn.execute(sql, (after_rowid,))
+
+
+# Coarser series buckets, as SQL over an hour bucket ("YYYY-MM-DDTHH").
+# Weeks start on Monday; months are keyed by their first day.
+SERIES_BUCKET_KEY = {
+    "day": "substr(bucket, 1, 10)",
+    "week": "date(substr(bucket, 1, 10), '-6 days', 'weekday 1')",
+    "month": "substr(bucket, 1, 7) || '-01'",
+}
+
+
+# Finest first; a month is counted at its longest
+SERIES_BUCKET_SECONDS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 31 * 86400,
+}
+
+
+def choose_series_bucket(start, end, bucket=None, minutes_since=None):
+    # Finest bucket, no finer than the requested one, that keeps the series
+    # within MAX_SERIES_POINTS points; months past that (500 months is ~40
+    # years). The retention job compacts minute rows older than its cutoff,
+    # so a range starting before minutes_since gets hours at least.
+    names = list(SERIES_BUCKET_SECONDS)
+    first = names.index(bucket) if bucket else 0
+    if minutes_since is not None and start < minutes_since:
+        first = max(first, names.index("hour"))
+
+    span = (end - start).total_seconds()
+    for name in names[first:-1]:
+        if span / SERIES_BUCKET_SECONDS[name] <= MAX_SERIES_POINTS:
+            return name
+    return "month"
+
+
+def _filters_sql(customer_id=None, merchant_id=None, start=None, end=None, ts="ts_us"):
+    # WHERE clause for the common transaction filters; start inclusive,
+    # end exclusive. ts is the instant column, or TS_US_FALLBACK.
+    clauses, params = [], []
+    if customer_id is not None:
+        clauses.append("customer_id = ?")
+        params.append(customer_id)
+    if merchant_id is not None:
+        clauses.append("merchant_id = ?")
+        params.append(merchant_id)
+    if start is not None:
+        clauses.append(f"{ts} >= ?")
+        params.append(to_epoch_us(start))
+    if end is not None:
+        clauses.append(f"{ts} < ?")
+        params.append(to_epoch_us(end))
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def _rowid_bound(up_to_rowid=None):
+    if up_to_rowid is None:
+        return "", []
+    return "WHERE rowid <= ?", [up_to_rowid]
+
+
+# Keyset cursors are opaque to clients: the (ts_us, rowid) of the last
+# row served, newest first
+def encode_cursor(ts_us, rowid) -> str:
+    raw = json.dumps([ts_us, rowid]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        ts_us, rowid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if not isinstance(ts_us, int) or not isinstance(rowid, int):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return ts_us, rowid
+
+
+def _transaction_out(row):
+    # Repository reads hand out timestamp as a naive local datetime built
+    # from the instant (_ts_us, ts_us or its fallback), not the stored text
+    ts_us = row.pop("_ts_us")
+    del row["ts_us"]
+    row["timestamp"] = from_epoch_us(ts_us) if ts_us is not None else None
+    return row
+
+
+# Databases this process has created and migrated, keyed like get_pool, and
+# those whose ts_us backfill has finished. Repositories are constructed per
+# engine, CLI and dashboard session; the schema work runs once per path.
+_prepared = set()
+_epoch_ready = set()
+_prepare_lock = threading.Lock()
+
 
 class TransactionRepository:
 
-    def __init__(self):
-        self._initialize_db()
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        pool_size: int = POOL_SIZE,
+        busy_timeout_ms: int = BUSY_TIMEOUT_MS
+    ):
+        self.db_path = db_path
+        self.pool = get_pool(
+            db_path,
+            size=pool_size,
+            busy_timeout_ms=busy_timeout_ms
+        )
+        with _prepare_lock:
+            if db_path not in _prepared:
+                self._initialize_db()
+                _prepared.add(db_path)
 
     def _initialize_db(self):
-        with sqlite3.connect(DB_PATH) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS transactions (
@@ -26,39 +565,271 @@ class TransactionRepository:
                     timestamp TEXT
                 )
             """)
-            conn.commit()
+        self._migrate()
+        if self._epoch_indexed():
+            _epoch_ready.add(self.db_path)
+        else:
+            threading.Thread(
+                target=self.backfill_epoch,
+                kwargs={"pause": BACKFILL_PAUSE},
+                name="ts-us-backfill",
+                daemon=True
+            ).start()
+
+    def _migrate(self):
+        with self.pool.connection() as conn:
+            # IMMEDIATE takes the write lock up front so concurrent workers
+            # starting together run each migration once
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                migration(conn)
+                conn.execute(f"PRAGMA user_version={number}")
+
+    def _epoch_indexed(self):
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'idx_transactions_ts_us'"
+            ).fetchone() is not None
+
+    @property
+    def epoch_ready(self) -> bool:
+        return self.db_path in _epoch_ready
+
+    def _ts(self):
+        # The instant column for reads; legacy rows still waiting for the
+        # backfill have theirs parsed from the text column
+        return "ts_us" if self.epoch_ready else TS_US_FALLBACK
+
+    def backfill_epoch(self, batch_size=BACKFILL_BATCH_SIZE, pause=0.0):
+        # Fills ts_us for rows written before the column existed, and
+        # rewrites their timestamp text to local time the way new rows are
+        # written: legacy text could carry a UTC offset, which put its rows
+        # in the wrong local day, hour and minute buckets. Their rollup
+        # contributions move with them. Text that does not parse is left
+        # alone and its ts_us stays NULL.
+        #
+        # Runs from a background thread on startup; the retention and
+        # snapshot CLIs call it directly. Each batch commits on its own, so
+        # the write lock is only held briefly and other workers keep writing
+        # while a large table catches up; rows inserted meanwhile already
+        # carry ts_us. Batches run under BEGIN IMMEDIATE, so several
+        # processes can backfill at once without shifting a rollup twice.
+        if self.epoch_ready:
+            return
+        with self.pool.connection() as conn:
+            first, last = conn.execute(
+                "SELECT MIN(rowid), MAX(rowid) FROM transactions WHERE ts_us IS NULL"
+            ).fetchone()
+
+        columns = ", ".join(TRANSACTION_COLUMNS)
+        if first is not None:
+            for low in range(first - 1, last, batch_size):
+                with self.pool.connection() as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    rows = conn.execute(
+                        f"SELECT rowid, {columns} FROM transactions "
+                        "WHERE rowid > ? AND rowid <= ? AND ts_us IS NULL",
+                        (low, low + batch_size)
+                    ).fetchall()
+                    updates, moved_from, moved_to = [], [], []
+                    for rowid, *row in rows:
+                        try:
+                            parsed = datetime.fromisoformat(row[_TIMESTAMP])
+                        except (TypeError, ValueError):
+                            continue
+                        local = to_local(parsed).isoformat()
+                        updates.append((local, to_epoch_us(parsed), rowid))
+                        if local != row[_TIMESTAMP]:
+                            moved_from.append(row)
+                            moved_to.append(row[:_TIMESTAMP] + [local] + row[_TIMESTAMP + 1:])
+                    conn.executemany(
+                        "UPDATE transactions SET timestamp = ?, ts_us = ? WHERE rowid = ?",
+                        updates
+                    )
+                    _shift_rollups(conn, moved_from, moved_to)
+                time.sleep(pause)
+
+        with self.pool.connection() as conn:
+            for sql in EPOCH_INDEX_SQL:
+                conn.execute(sql)
+        _epoch_ready.add(self.db_path)
+
     def get_unique_customers(self):
-        with sqlite3.connect(DB_PATH) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT DISTINCT customer_id FROM transactions")
             return [row[0] for row in cursor.fetchall()]
 
     def get_unique_merchants(self):
-        with sqlite3.connect(DB_PATH) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT DISTINCT merchant_id FROM transactions")
             return [row[0] for row in cursor.fetchall()]
     
+    def has_transactions(self):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM transactions LIMIT 1")
+            return cursor.fetchone() is not None
+
+    def find_transactions(
+        self,
+        customer_id=None,
+        merchant_id=None,
+        start=None,
+        end=None,
+        limit=None,
+        newest_first=True,
+        archived=False
+    ):
+        # archived=True reads transactions_all, the hot table plus every
+        # archived month; the filters are pushed into each partition
+        ts = self._ts()
+        where, params = _filters_sql(customer_id, merchant_id, start, end, ts)
+        order = "DESC" if newest_first else "ASC"
+        table = "transactions_all" if archived else "transactions"
+        sql = f"SELECT {ts} AS _ts_us, * FROM {table} {where} ORDER BY {ts} {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self.pool.connection() as conn:
+            _register_functions(conn, ts)
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(sql, params)
+            return [_transaction_out(dict(row)) for row in cursor.fetchall()]
+
+    def count_transactions(
+        self,
+        customer_id=None,
+        merchant_id=None,
+        start=None,
+        end=None,
+        archived=False
+    ):
+        ts = self._ts()
+        where, params = _filters_sql(customer_id, merchant_id, start, end, ts)
+        table = "transactions_all" if archived else "transactions"
+        with self.pool.connection() as conn:
+            _register_functions(conn, ts)
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM {table} {where}", params)
+            return cursor.fetchone()[0]
+
+    def _keyset_sql(self, cursor, filters):
+        # Rows whose timestamp never parsed have no place in the order and
+        # are left out of pages
+        ts = self._ts()
+        where, params = _filters_sql(**filters, ts=ts)
+        where += f"{' AND' if where else 'WHERE'} {ts} IS NOT NULL"
+        if cursor is not None:
+            ts_us, rowid = decode_cursor(cursor)
+            where += f" AND ({ts}, rowid) < (?, ?)"
+            params += [ts_us, rowid]
+        sql = (
+            f"SELECT rowid AS _rowid, {ts} AS _ts_us, * FROM transactions {where} "
+            f"ORDER BY {ts} DESC, rowid DESC"
+        )
+        return sql, params, ts
+
+    def page_transactions(self, limit=50, cursor=None, **filters):
+        # One keyset page, newest first. Returns (rows, next_cursor);
+        # next_cursor is None on the last page.
+        sql, params, ts = self._keyset_sql(cursor, filters)
+        with self.pool.connection() as conn:
+            _register_functions(conn, ts)
+            db_cursor = conn.cursor()
+            db_cursor.row_factory = sqlite3.Row
+            db_cursor.execute(f"{sql} LIMIT ?", params + [limit + 1])
+            rows = [dict(row) for row in db_cursor.fetchall()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["_ts_us"], rows[-1]["_rowid"])
+        for row in rows:
+            del row["_rowid"]
+        return [_transaction_out(row) for row in rows], next_cursor
+
+    def iter_transactions(self, batch_size=1000, cursor=None, **filters):
+        # Streams every matching row newest first, one keyset page at a
+        # time. Each page takes and returns its own pooled connection, so a
+        # slow client never holds one for the whole download.
+        while True:
+            rows, cursor = self.page_transactions(batch_size, cursor, **filters)
+            yield from rows
+            if cursor is None:
+                break
+
+    def iter_customer_activity(self, since, batch_size=5000):
+        # (customer_id, timestamp) for every row at or after since, oldest
+        # first; an index range scan on idx_transactions_ts_us once the
+        # backfill is done
+        ts = self._ts()
+        with self.pool.connection() as conn:
+            _register_functions(conn, ts)
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT customer_id, {ts} FROM transactions "
+                f"WHERE {ts} >= ? ORDER BY {ts}",
+                (to_epoch_us(since),)
+            )
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for customer_id, ts_us in batch:
+                    yield customer_id, from_epoch_us(ts_us)
+
     def get_all_transactions(self):
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM transactions")
             return [dict(row) for row in cursor.fetchall()]
 
-    def save_transaction_from_seed(
-        self,
+    @staticmethod
+    def seed_row(
         transaction_id,
         customer_id,
         merchant_id,
         amount,
         timestamp
     ):
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        # Fake approval + risk for historical realism
+        local = to_local(timestamp)
+        return (
+            transaction_id,
+            customer_id,
+            merchant_id,
+            amount,
+            0.0,
+            "LOW",
+            1,
+            "Historical seed",
+            amount,
+            local.isoformat(),
+            "approved",
+            to_epoch_us(timestamp)
+        )
+
+    @staticmethod
+    def seed_rows_from_columns(columns):
+        # Column chunks as produced by app.core.population batch generators
+        wall = columns["timestamp"].astype("datetime64[us]")
+        timestamps = np.datetime_as_string(wall, unit="us")
+        epochs = _local_wall_to_epoch_us(wall.astype(np.int64))
+        for transaction_id, customer_id, merchant_id, amount, timestamp, ts_us in zip(
+            columns["transaction_id"],
+            columns["customer_id"].tolist(),
+            columns["merchant_id"].tolist(),
+            columns["amount"].tolist(),
+            timestamps.tolist(),
+            epochs.tolist()
+        ):
+            yield (
                 transaction_id,
                 customer_id,
                 merchant_id,
@@ -68,25 +839,400 @@ class TransactionRepository:
                 1,
                 "Historical seed",
                 amount,
-                timestamp.isoformat()
-            ))
-            conn.commit()
+                timestamp,
+                "approved",
+                ts_us
+            )
+
+    def save_transaction_from_seed(
+        self,
+        transaction_id,
+        customer_id,
+        merchant_id,
+        amount,
+        timestamp
+    ):
+        row = self.seed_row(
+            transaction_id,
+            customer_id,
+            merchant_id,
+            amount,
+            timestamp
+        )
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(INSERT_SQL, row)
+            _apply_rollups(conn, [row])
+
+    def bulk_insert(
+        self,
+        rows,
+        chunk_size=BULK_CHUNK_SIZE,
+        synchronous="OFF",
+        on_progress=None,
+        commit_every=None,
+        commit_pause=0.0
+    ):
+        # chunk_size rows per executemany(), in one transaction, or one per
+        # commit_every rows so a load next to live traffic only holds the
+        # write lock briefly; commit_pause seconds after each such commit
+        # give waiting writers their turn. Rows are consumed lazily so seeders can stream
+        # generators straight in. The DB stays in WAL (no rollback journal
+        # to double-write), only fsyncs are relaxed for the load and
+        # restored afterwards. Each transaction's rows are merged into the
+        # rollups with one GROUP BY before it commits, rather than per row.
+        # on_progress gets the running row count after every chunk, or with
+        # commit_every after every commit, outside the transaction, so it
+        # may write to the database itself.
+        rows = iter(rows)
+        inserted = 0
+
+        with self.pool.connection() as conn:
+            previous_sync = conn.execute("PRAGMA synchronous").fetchone()[0]
+            conn.execute(f"PRAGMA synchronous={synchronous}")
+            try:
+                after_rowid = pending = 0
+                while True:
+                    # Pulled before the lock is (re)taken, so generating a
+                    # chunk never holds up other writers
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    if not conn.in_transaction:
+                        # Write lock first, so no other writer's rows
+                        # (already in the rollups) land above the
+                        # watermark merged from
+                        conn.execute("BEGIN IMMEDIATE")
+                        after_rowid = conn.execute(
+                            "SELECT COALESCE(MAX(rowid), 0) FROM transactions"
+                        ).fetchone()[0]
+                        pending = 0
+                    conn.executemany(INSERT_SQL, chunk)
+                    inserted += len(chunk)
+                    pending += len(chunk)
+                    if commit_every is None:
+                        if on_progress:
+                            on_progress(inserted)
+                    elif pending >= commit_every:
+                        _merge_rollups(conn, after_rowid)
+                        conn.commit()
+                        if on_progress:
+                            on_progress(inserted)
+                        time.sleep(commit_pause)
+                if conn.in_transaction:
+                    _merge_rollups(conn, after_rowid)
+                    conn.commit()
+                    if on_progress and commit_every is not None:
+                        on_progress(inserted)
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                conn.execute(f"PRAGMA synchronous={previous_sync}")
+
+        return inserted
+
+    def bulk_insert_columns(self, column_chunks, chunk_size=BULK_CHUNK_SIZE, **pragmas):
+        return self.bulk_insert(
+            (
+                row
+                for columns in column_chunks
+                for row in self.seed_rows_from_columns(columns)
+            ),
+            chunk_size=chunk_size,
+            **pragmas
+        )
+
+    # ------------------------
+    # STARTUP SEED CLAIM
+    # ------------------------
+    def claim_seed(self, owner) -> bool:
+        # True for exactly one caller across processes, and only while the
+        # table is empty
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM transactions LIMIT 1").fetchone():
+                return False
+            conn.execute(
+                "DELETE FROM seed_claim WHERE name = 'history' "
+                "AND finished_at IS NULL AND claimed_at < ?",
+                (time.time() - SEED_CLAIM_TTL,)
+            )
+            return conn.execute(
+                "INSERT OR IGNORE INTO seed_claim (name, owner, claimed_at) "
+                "VALUES ('history', ?, ?)",
+                (str(owner), time.time())
+            ).rowcount == 1
+
+    def refresh_seed_claim(self, owner):
+        # Heartbeat from the seeding process: the claim only lapses
+        # SEED_CLAIM_TTL after its owner last made progress
+        with self.pool.connection() as conn:
+            conn.execute(
+                "UPDATE seed_claim SET claimed_at = ? "
+                "WHERE name = 'history' AND owner = ? AND finished_at IS NULL",
+                (time.time(), str(owner))
+            )
+
+    def finish_seed_claim(self, failed=False):
+        # A failed seed gives the claim up so a restart can try again
+        with self.pool.connection() as conn:
+            if failed:
+                conn.execute("DELETE FROM seed_claim WHERE name = 'history'")
+            else:
+                conn.execute(
+                    "UPDATE seed_claim SET finished_at = ? WHERE name = 'history'",
+                    (time.time(),)
+                )
+
+    def seed_claim_owner(self):
+        # Owner of the live claim, or None when no process is seeding
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT owner FROM seed_claim WHERE name = 'history' "
+                "AND finished_at IS NULL AND claimed_at >= ?",
+                (time.time() - SEED_CLAIM_TTL,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def seed_claimed(self) -> bool:
+        # Whether some process is seeding right now
+        return self.seed_claim_owner() is not None
+
+    @staticmethod
+    def _transaction_row(transaction, response):
+        timestamp = transaction.timestamp
+        return (
+            transaction.transaction_id,
+            transaction.customer_id,
+            transaction.merchant_id,
+            transaction.amount,
+            response.risk_assessment.risk_score,
+            response.risk_assessment.risk_level,
+            int(response.approved),
+            response.message,
+            response.revenue_saved,
+            to_local(timestamp).isoformat(),
+            response.status,
+            to_epoch_us(timestamp)
+        )
 
     def save_transaction(self, transaction, response):
-        with sqlite3.connect(DB_PATH) as conn:
+        row = self._transaction_row(transaction, response)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(INSERT_SQL, row)
+            _apply_rollups(conn, [row])
+
+    def save_transactions(self, decisions):
+        # Group commit: (transaction, response) pairs in one transaction
+        rows = [self._transaction_row(t, r) for t, r in decisions]
+        with self.pool.connection() as conn:
+            conn.executemany(INSERT_SQL, rows)
+            _apply_rollups(conn, rows)
+        return len(rows)
+
+    def existing_transaction_ids(self, transaction_ids):
+        # The subset already stored; one primary key probe each
+        transaction_ids = list(transaction_ids)
+        if not transaction_ids:
+            return set()
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                "SELECT transaction_id FROM transactions WHERE transaction_id IN "
+                f"({', '.join('?' * len(transaction_ids))})",
+                transaction_ids
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    # ------------------------
+    # ANALYTICS
+    # ------------------------
+    def get_merchant_rollup(self, merchant_id, start_day, end_day):
+        # Sums the daily rollup rows for [start_day, end_day], both dates
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("""
-                INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                SELECT
+                    COALESCE(SUM(total), 0) AS total,
+                    COALESCE(SUM(approved), 0) AS approved,
+                    COALESCE(SUM(declined), 0) AS declined,
+                    COALESCE(SUM(pre_verified), 0) AS pre_verified,
+                    COALESCE(SUM(fraud_prevented), 0) AS fraud_prevented,
+                    COALESCE(SUM(revenue_saved), 0.0) AS revenue_saved,
+                    COALESCE(SUM(risk_score_sum), 0.0) AS risk_score_sum
+                FROM merchant_daily_rollup
+                WHERE merchant_id = ? AND day >= ? AND day <= ?
+            """, (merchant_id, start_day.isoformat(), end_day.isoformat()))
+            return dict(cursor.fetchone())
+
+    def get_time_series(self, start, end, bucket):
+        # (bucket_start, total, approved, amount_sum, risk_score_sum) per
+        # bucket overlapping [start, end], oldest first; empty buckets are
+        # omitted. Day, week and month buckets sum the hour rows they cover.
+        granularity = "minute" if bucket == "minute" else "hour"
+        width = TIME_ROLLUP_PREFIX[granularity]
+        key = SERIES_BUCKET_KEY.get(bucket, "bucket")
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {key}, SUM(total), SUM(approved), SUM(amount_sum), SUM(risk_score_sum)
+                FROM time_rollup
+                WHERE granularity = ? AND bucket >= ? AND bucket <= ?
+                GROUP BY {key}
+                ORDER BY {key}
             """, (
-                transaction.transaction_id,
-                transaction.customer_id,
-                transaction.merchant_id,
-                transaction.amount,
-                response.risk_assessment.risk_score,
-                response.risk_assessment.risk_level,
-                int(response.approved),
-                response.message,
-                response.revenue_saved,
-                transaction.timestamp.isoformat()
+                granularity,
+                to_local(start).isoformat()[:width],
+                to_local(end).isoformat()[:width]
             ))
-            conn.commit()
\ No newline at end of file
+            return [
+                (datetime.fromisoformat(bucket_key), *totals)
+                for bucket_key, *totals in cursor.fetchall()
+            ]
+
+    def get_time_range(self):
+        # (first, last) hour holding any transaction, or None when empty
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT MIN(bucket), MAX(bucket) FROM time_rollup WHERE granularity = 'hour'"
+            )
+            first, last = cursor.fetchone()
+        if first is None:
+            return None
+        return datetime.fromisoformat(first), datetime.fromisoformat(last)
+
+    # ------------------------
+    # DASHBOARD AGGREGATES
+    # ------------------------
+    def get_dashboard_summary(self, up_to_rowid=None):
+        # Every headline figure in one scan of the table. up_to_rowid pins
+        # the figures to a watermark so later rows can be folded in exactly.
+        where, params = _rowid_bound(up_to_rowid)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(f"""
+                SELECT
+                    COUNT(*) AS total,
+                    COALESCE(SUM(approved = 1), 0) AS approved,
+                    COALESCE(SUM(approved = 0), 0) AS declined,
+                    COALESCE(SUM(status = 'pre_verified'), 0) AS pre_verified,
+                    COALESCE(SUM(CASE WHEN approved = 1 THEN amount END), 0.0)
+                        AS approved_amount,
+                    COALESCE(SUM(revenue_saved), 0.0) AS revenue_saved,
+                    COALESCE(SUM(amount), 0.0) AS amount_sum,
+                    COALESCE(AVG(amount), 0.0) AS avg_amount,
+                    COALESCE(MAX(amount), 0.0) AS max_amount,
+                    COALESCE(SUM(risk_score), 0.0) AS risk_score_sum,
+                    COALESCE(AVG(risk_score), 0.0) AS avg_risk_score,
+                    COALESCE(SUM(lower(risk_level) IN ('high', 'critical')), 0)
+                        AS high_risk,
+                    COALESCE(SUM(lower(risk_level) = 'medium'), 0) AS medium_risk,
+                    COALESCE(SUM(lower(risk_level) = 'low'), 0) AS low_risk,
+                    COALESCE(SUM(approved = 0 AND risk_score >= {FRAUD_SCORE}), 0)
+                        AS fraud_prevented
+                FROM transactions {where}
+            """, params)
+            return dict(cursor.fetchone())
+
+    def get_risk_level_counts(self, up_to_rowid=None):
+        # Seed rows store "LOW"; live decisions store the enum's lowercase
+        where, params = _rowid_bound(up_to_rowid)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT lower(risk_level) AS level, COUNT(*) "
+                f"FROM transactions {where} GROUP BY level",
+                params
+            )
+            return dict(cursor.fetchall())
+
+    def get_risk_histogram(self, bins=20, up_to_rowid=None):
+        # Counts per equal-width bin over 0-100; a score of exactly 100
+        # lands in the last bin
+        where, params = _rowid_bound(up_to_rowid)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT MIN(CAST(risk_score * ? / 100 AS INTEGER), ? - 1) AS bin, COUNT(*)
+                FROM transactions {where}
+                GROUP BY bin
+            """, [bins, bins] + params)
+            counts = [0] * bins
+            for bin_index, count in cursor.fetchall():
+                counts[max(0, bin_index)] += count
+            return counts
+
+    def get_top_approved_amounts(self, group_by, limit=10):
+        # Approved spend per merchant or per customer, largest first
+        if group_by not in ("merchant_id", "customer_id"):
+            raise ValueError(f"Cannot group by {group_by!r}")
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {group_by}, SUM(amount) AS total
+                FROM transactions
+                WHERE approved = 1
+                GROUP BY {group_by}
+                ORDER BY total DESC
+                LIMIT ?
+            """, (limit,))
+            return cursor.fetchall()
+
+    # ------------------------
+    # ROWID WATERMARKS
+    # ------------------------
+    # Rowids only grow as rows are committed, so "rowid > watermark" is
+    # exactly the set of rows a reader has not seen yet
+    def get_max_rowid(self):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(rowid), 0) FROM transactions")
+            return cursor.fetchone()[0]
+
+    def get_rows_after(self, rowid, limit=5000):
+        # Oldest first, each row carrying its rowid as _rowid
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(
+                "SELECT rowid AS _rowid, * FROM transactions "
+                "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (rowid, limit)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def iter_row_chunks(self, columns, after_rowid=0, up_to_rowid=None, chunk_size=100_000):
+        # Lists of raw row tuples in rowid order. One statement feeds every
+        # chunk, so they all come from the same WAL read snapshot.
+        sql = f"SELECT {', '.join(columns)} FROM transactions WHERE rowid > ?"
+        params = [after_rowid]
+        if up_to_rowid is not None:
+            sql += " AND rowid <= ?"
+            params.append(up_to_rowid)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{sql} ORDER BY rowid", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+    def get_latest_rows(self, limit, up_to_rowid=None, high_risk_only=False):
+        # Most recently inserted first, at or below the watermark
+        where, params = _rowid_bound(up_to_rowid)
+        if high_risk_only:
+            where += " AND " if where else "WHERE "
+            where += "lower(risk_level) IN ('high', 'critical')"
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(
+                f"SELECT rowid AS _rowid, * FROM transactions {where} "
+                "ORDER BY rowid DESC LIMIT ?",
+                params + [limit]
+            )
+            return [dict(row) for row in cursor.fetchall()]
@@ -0,0 +1,161 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Attempts per write when SQLite reports a transient error (locked or busy
+# past the busy timeout), with doubling backoff from RETRY_BACKOFF seconds
+WRITE_ATTEMPTS = 4
+RETRY_BACKOFF = 0.05
+
+
+class WriterClosed(Exception):
+    pass
+
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    # Decouples authorization latency from disk: decisions are queued and a
+    # background thread persists them with save_transactions() in group
+    # commits of up to batch_size rows, or whatever arrived within
+    # flush_interval seconds of the first queued row. A full queue blocks
+    # submit() (backpressure) for up to put_timeout seconds, then raises.
+
+    def __init__(
+        self,
+        repository,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        put_timeout: float = 5.0
+    ):
+        self.repository = repository
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self.rows_written = 0
+        self.batches_written = 0
+        self.failed_rows = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="write-behind",
+            daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, transaction, response):
+        if self._closed:
+            raise WriterClosed("write-behind queue is shut down")
+        self._queue.put((transaction, response), timeout=self.put_timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    @staticmethod
+    def _with_retries(write, *args):
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                return write(*args)
+            except sqlite3.OperationalError:
+                if attempt == WRITE_ATTEMPTS - 1:
+                    raise
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    def _fail(self, rows, exc):
+        # Keep the writer alive; failures show in stats(), /health and the
+        # write_failed_rows gauge
+        self.failed_rows += rows
+        self.last_error = repr(exc)
+
+    def _flush(self, batch):
+        try:
+            self._with_retries(self.repository.save_transactions, batch)
+        except sqlite3.IntegrityError:
+            # One bad row (typically a client retry reusing a transaction
+            # id) must not take the rest of the group commit with it
+            self._flush_rows(batch)
+            return
+        except Exception as exc:
+            self._fail(len(batch), exc)
+            logger.exception("write-behind flush of %d rows failed", len(batch))
+            return
+        self.rows_written += len(batch)
+        self.batches_written += 1
+
+    def _flush_rows(self, batch):
+        for transaction, response in batch:
+            try:
+                self._with_retries(self.repository.save_transaction, transaction, response)
+            except Exception as exc:
+                self._fail(1, exc)
+                logger.error(
+                    "write-behind could not save transaction %s: %r",
+                    transaction.transaction_id, exc
+                )
+                continue
+            self.rows_written += 1
+        self.batches_written += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._flush(batch)
+
+        # Drain anything queued behind the stop marker
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for start in range(0, len(leftover), self.batch_size):
+            self._flush(leftover[start:start + self.batch_size])
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "failed_rows": self.failed_rows,
+            "last_error": self.last_error,
+        }
+
+    def close(self, timeout: float = 30.0):
+        # Flush everything already accepted, then stop the thread
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
@@ -1,35 +1,118 @@
 import random
-from datetime import datetime, timedelta
+from bisect import bisect_right
+from datetime import datetime
 from typing import Dict, List
+import numpy as np
 from app.model import Transaction, RiskAssessment, RiskLevel
+from app.state.velocity import VelocityTracker, epoch_seconds
+
+# Amount bands: below AMOUNT_BOUNDS[i] scores AMOUNT_RISK[i], above the
+# last bound scores AMOUNT_RISK[-1]. Shared by the scalar and batch paths.
+AMOUNT_BOUNDS = [50, 200, 500, 1000]
+AMOUNT_RISK = [5.0, 10.0, 20.0, 30.0, 40.0]
+
+
+def _hour_risk(hour: int) -> float:
+    # Suspicious hours: 2 AM - 6 AM
+    if 2 <= hour <= 6:
+        return 15.0
+    # Somewhat unusual: 11 PM - 2 AM or 6 AM - 7 AM
+    elif hour >= 23 or hour <= 7:
+        return 5.0
+    else:
+        return 0.0
+
+
+HOUR_RISK = [_hour_risk(hour) for hour in range(24)]
+
+_AMOUNT_BOUNDS_NP = np.array(AMOUNT_BOUNDS, dtype=np.float64)
+_AMOUNT_RISK_NP = np.array(AMOUNT_RISK)
+_HOUR_RISK_NP = np.array(HOUR_RISK)
+
 
 class RiskEngine:
-    def __init__(self):
-        self.velocity_tracker: Dict[str, List[datetime]] = {}
+    def __init__(self, velocity_tracker=None):
+        # Any object with VelocityTracker's record() contract, e.g. a
+        # shared tracker from app.state.backend
+        self.velocity_tracker = velocity_tracker or VelocityTracker()
         self.known_devices: Dict[str, set] = {}
     
     def calculate_risk_score(self, transaction: Transaction) -> RiskAssessment:
-        risk_factors = []
-        total_risk_score = 0.0
-        
         # Transaction Amount
         amount_risk = self._assess_amount_risk(transaction.amount)
+
+        # Velocity: multiple transactions in a short time 
+        velocity_risk = self._assess_velocity(
+            transaction.customer_id,
+            transaction.timestamp
+        )
+
+        # Time-based Patterns
+        time_risk = self._assess_time_patterns(transaction.timestamp)
+
+        return self._build_assessment(
+            transaction,
+            amount_risk,
+            velocity_risk,
+            time_risk
+        )
+
+    def calculate_risk_scores(self, transactions: List[Transaction]) -> List[RiskAssessment]:
+        # Batch path: amount and hour bands are looked up over NumPy arrays,
+        # velocity is still updated per customer in request order. Results
+        # match calling calculate_risk_score on each transaction in turn.
+        amounts = np.fromiter(
+            (t.amount for t in transactions),
+            dtype=np.float64,
+            count=len(transactions)
+        )
+        hours = np.fromiter(
+            (t.timestamp.hour for t in transactions),
+            dtype=np.int64,
+            count=len(transactions)
+        )
+
+        amount_risks = _AMOUNT_RISK_NP[
+            np.searchsorted(_AMOUNT_BOUNDS_NP, amounts, side="right")
+        ].tolist()
+        time_risks = _HOUR_RISK_NP[hours].tolist()
+        velocity_risks = [
+            self._assess_velocity(t.customer_id, t.timestamp)
+            for t in transactions
+        ]
+
+        return [
+            self._build_assessment(transaction, amount_risk, velocity_risk, time_risk)
+            for transaction, amount_risk, velocity_risk, time_risk in zip(
+                transactions,
+                amount_risks,
+                velocity_risks,
+                time_risks
+            )
+        ]
+
+    def _build_assessment(
+        self,
+        transaction: Transaction,
+        amount_risk: float,
+        velocity_risk: float,
+        time_risk: float
+    ) -> RiskAssessment:
+        risk_factors = []
+        total_risk_score = 0.0
+
         total_risk_score += amount_risk
         if amount_risk > 15:
             risk_factors.append(f"High transaction amount: ${transaction.amount:.2f}")
-        
-        # Velocity: multiple transactions in a short time 
-        velocity_risk = self._assess_velocity(transaction.customer_id)
+
         total_risk_score += velocity_risk
         if velocity_risk > 10:
             risk_factors.append("Multiple transactions in short timeframe")
-        
-        # Time-based Patterns
-        time_risk = self._assess_time_patterns(transaction.timestamp)
+
         total_risk_score += time_risk
         if time_risk > 10:
             risk_factors.append("Transaction at unusual time")
-        
+
         # Cap the score at 100
         total_risk_score = min(100.0, total_risk_score)
         
@@ -52,35 +135,15 @@ class RiskEngine:
         )
     # risk assessment
     def _assess_amount_risk(self, amount: float) -> float:
-        if amount < 50:
-            return 5.0
-        elif amount < 200:
-            return 10.0
-        elif amount < 500:
-            return 20.0
-        elif amount < 1000:
-            return 30.0
-        else:
-            # Very high amounts
-            return 40.0
+        # Very high amounts fall off the end of the bands: 40.0
+        return AMOUNT_RISK[bisect_right(AMOUNT_BOUNDS, amount)]
     # velocity assessment
-    def _assess_velocity(self, customer_id: str) -> float:
-        now = datetime.now()
-        
-        # Initialize tracking for new customers
-        if customer_id not in self.velocity_tracker:
-            self.velocity_tracker[customer_id] = []
-
-        self.velocity_tracker[customer_id] = [
-            ts for ts in self.velocity_tracker[customer_id]
-            if now - ts < timedelta(hours=1)
-        ]
-        
-        # Count recent transactions
-        recent_count = len(self.velocity_tracker[customer_id])
-        
-        # Add this transaction to the tracker
-        self.velocity_tracker[customer_id].append(now)
+    def _assess_velocity(self, customer_id: str, timestamp: datetime) -> float:
+        # Count recent transactions (by event time) and add this one
+        recent_count = self.velocity_tracker.record(
+            customer_id,
+            epoch_seconds(timestamp)
+        )
         
         #  velocity risk
         if recent_count >= 5:
@@ -94,16 +157,7 @@ class RiskEngine:
     
     def _assess_time_patterns(self, timestamp: datetime) -> float:
         # flagging trasactions at unusual hours 
-        hour = timestamp.hour
-        
-        # Suspicious hours: 2 AM - 6 AM
-        if 2 <= hour <= 6:
-            return 15.0
-        # Somewhat unusual: 11 PM - 2 AM or 6 AM - 7 AM
-        elif hour >= 23 or hour <= 7:
-            return 5.0
-        else:
-            return 0.0
+        return HOUR_RISK[timestamp.hour]
     
     def _categorize_risk_level(self, risk_score: float) -> RiskLevel:
         # converting numeric score to categorical level
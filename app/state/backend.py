@@ -0,0 +1,242 @@
+import os
+import time
+from datetime import timedelta
+from typing import Optional
+
+from app.model import PreVerificationResponse
+from app.repository.pool import get_pool
+from app.state.tokens import TokenEntry, TokenStore
+from app.state.velocity import VelocityTracker
+
+# "memory": per-process state (default, single worker)
+# "sqlite": shared by every worker on the host through a WAL SQLite file
+STATE_BACKEND = os.environ.get("OVERIDE_STATE_BACKEND", "memory")
+STATE_DB_PATH = os.environ.get("OVERIDE_STATE_DB", "override_state.db")
+
+# Upper bound on outstanding pre-verification tokens
+MAX_TOKENS = int(os.environ.get("OVERIDE_MAX_TOKENS", 100_000))
+
+
+# ------------------------
+# IN-PROCESS
+# ------------------------
+class InMemoryStateBackend:
+    # Lost on restart; velocity is rebuilt by the engine's warm start
+    persistent = False
+
+    def __init__(
+        self,
+        velocity_window: timedelta = timedelta(hours=1),
+        max_tokens: int = MAX_TOKENS
+    ):
+        self.velocity = VelocityTracker(window=velocity_window)
+        self.tokens = TokenStore(max_size=max_tokens)
+
+    def close(self):
+        pass
+
+
+# ------------------------
+# SHARED (SQLITE, WAL)
+# ------------------------
+class SharedVelocityTracker:
+    # Same record()/sweep() contract as VelocityTracker, kept in a SQLite
+    # table so every worker process sees every event. record() runs under
+    # BEGIN IMMEDIATE, making count-then-insert atomic across processes.
+
+    def __init__(
+        self,
+        pool,
+        window: timedelta = timedelta(hours=1),
+        max_counted: int = 32,
+        purge_every: int = 1024
+    ):
+        self.pool = pool
+        self.window = window.total_seconds()
+        self.max_counted = max_counted
+        self.purge_every = purge_every
+        self._since_purge = 0
+
+        with self.pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS velocity_events (
+                    customer_id TEXT NOT NULL,
+                    ts REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_velocity_customer_ts "
+                "ON velocity_events(customer_id, ts)"
+            )
+
+    def record(self, customer_id: str, ts: float) -> int:
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            recent_count = conn.execute("""
+                SELECT COUNT(*) FROM (
+                    SELECT 1 FROM velocity_events
+                    WHERE customer_id = ? AND ts > ? AND ts <= ?
+                    LIMIT ?
+                )
+            """, (customer_id, ts - self.window, ts, self.max_counted)).fetchone()[0]
+            conn.execute(
+                "INSERT INTO velocity_events (customer_id, ts) VALUES (?, ?)",
+                (customer_id, ts)
+            )
+
+            # Purged against the wall clock, never the client-supplied ts:
+            # a future-dated event would otherwise wipe every worker's window
+            self._since_purge += 1
+            if self._since_purge >= self.purge_every:
+                self._since_purge = 0
+                conn.execute(
+                    "DELETE FROM velocity_events WHERE ts <= ?",
+                    (time.time() - self.window,)
+                )
+        return recent_count
+
+    def sweep(self, now: float = None) -> int:
+        now = time.time() if now is None else now
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "DELETE FROM velocity_events WHERE ts <= ?",
+                (now - self.window,)
+            ).rowcount
+
+    def load_events(self, events) -> int:
+        loaded = 0
+        for customer_id, ts in events:
+            self.record(customer_id, ts)
+            loaded += 1
+        return loaded
+
+    def stats(self) -> dict:
+        with self.pool.connection() as conn:
+            customers, events = conn.execute(
+                "SELECT COUNT(DISTINCT customer_id), COUNT(*) FROM velocity_events"
+            ).fetchone()
+        return {"customers": customers, "events": events}
+
+
+class SharedTokenStore:
+    # TokenStore's put()/get() contract in SQLite: keyed by token, expiry
+    # via an index on expires_at, size capped by dropping the tokens that
+    # expire soonest
+
+    def __init__(self, pool, max_size: int = MAX_TOKENS, purge_every: int = 1024):
+        self.pool = pool
+        self.max_size = max_size
+        self.purge_every = purge_every
+        self._since_purge = 0
+
+        with self.pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS verification_tokens (
+                    token TEXT PRIMARY KEY,
+                    customer_id TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    payload TEXT NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_tokens_expires "
+                "ON verification_tokens(expires_at)"
+            )
+
+    def put(
+        self,
+        customer_id: str,
+        amount: float,
+        verification: PreVerificationResponse
+    ) -> TokenEntry:
+        entry = TokenEntry(
+            verification.verification_token,
+            customer_id,
+            amount,
+            verification.expires_at.timestamp(),
+            verification
+        )
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO verification_tokens VALUES (?, ?, ?, ?, ?)",
+                (
+                    entry.token,
+                    customer_id,
+                    amount,
+                    entry.expires_at,
+                    verification.model_dump_json()
+                )
+            )
+
+            self._since_purge += 1
+            if self._since_purge >= self.purge_every:
+                self._since_purge = 0
+                self._purge(conn)
+        return entry
+
+    def _purge(self, conn):
+        conn.execute(
+            "DELETE FROM verification_tokens WHERE expires_at <= ?",
+            (time.time(),)
+        )
+        conn.execute("""
+            DELETE FROM verification_tokens WHERE token IN (
+                SELECT token FROM verification_tokens
+                ORDER BY expires_at
+                LIMIT MAX(0, (SELECT COUNT(*) FROM verification_tokens) - ?)
+            )
+        """, (self.max_size,))
+
+    def get(self, token: str) -> Optional[TokenEntry]:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT customer_id, amount, expires_at, payload "
+                "FROM verification_tokens WHERE token = ? AND expires_at > ?",
+                (token, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        customer_id, amount, expires_at, payload = row
+        return TokenEntry(
+            token,
+            customer_id,
+            amount,
+            expires_at,
+            PreVerificationResponse.model_validate_json(payload)
+        )
+
+    def __len__(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM verification_tokens"
+            ).fetchone()[0]
+
+    def stats(self) -> dict:
+        return {"tokens": len(self), "max_size": self.max_size}
+
+
+class SQLiteStateBackend:
+    # State survives restarts in the file itself, so no warm start needed
+    persistent = True
+
+    def __init__(
+        self,
+        db_path: str = STATE_DB_PATH,
+        velocity_window: timedelta = timedelta(hours=1),
+        max_tokens: int = MAX_TOKENS
+    ):
+        self.pool = get_pool(db_path)
+        self.velocity = SharedVelocityTracker(self.pool, window=velocity_window)
+        self.tokens = SharedTokenStore(self.pool, max_size=max_tokens)
+
+    def close(self):
+        pass
+
+
+def create_state_backend(kind: str = STATE_BACKEND):
+    if kind == "memory":
+        return InMemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend()
+    raise ValueError(f"Unknown state backend: {kind!r} (expected 'memory' or 'sqlite')")
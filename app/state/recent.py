@@ -0,0 +1,87 @@
+import threading
+from datetime import datetime
+
+
+class Decision:
+    # Flat copy of what the dashboard needs from a decision; holding the
+    # pydantic Transaction/AuthorizationResponse objects would keep every
+    # nested model (risk factors and all) alive
+
+    __slots__ = (
+        "transaction_id",
+        "customer_id",
+        "merchant_id",
+        "amount",
+        "timestamp",
+        "status",
+        "approved",
+        "risk_score",
+        "risk_level",
+        "revenue_saved",
+        "pre_verified",
+        "decided_at",
+    )
+
+    def __init__(self, transaction, response, pre_verified: bool):
+        self.transaction_id = transaction.transaction_id
+        self.customer_id = transaction.customer_id
+        self.merchant_id = transaction.merchant_id
+        self.amount = transaction.amount
+        self.timestamp = transaction.timestamp
+        self.status = response.status.value
+        self.approved = response.approved
+        self.risk_score = response.risk_assessment.risk_score
+        self.risk_level = response.risk_assessment.risk_level.value
+        self.revenue_saved = response.revenue_saved
+        self.pre_verified = pre_verified
+        self.decided_at = datetime.now()
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RecentDecisions:
+    # Fixed-capacity ring buffer: append overwrites the oldest slot in O(1)
+    # and memory never grows past capacity decisions
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, transaction, response, pre_verified: bool):
+        decision = Decision(transaction, response, pre_verified)
+        with self._lock:
+            self._slots[self._next] = decision
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _newest_first(self):
+        # The lock only covers reading the head; a concurrent append may
+        # overwrite a slot mid-scan, which is fine for a monitoring view
+        with self._lock:
+            slots, newest, count = self._slots, self._next - 1, self._count
+        for offset in range(count):
+            yield slots[(newest - offset) % self.capacity]
+
+    def last(self, n: int):
+        result = []
+        for decision in self._newest_first():
+            if len(result) >= n:
+                break
+            result.append(decision)
+        return result
+
+    def last_for_merchant(self, merchant_id: str, n: int):
+        result = []
+        for decision in self._newest_first():
+            if len(result) >= n:
+                break
+            if decision.merchant_id == merchant_id:
+                result.append(decision)
+        return result
+
+    def __len__(self) -> int:
+        return self._count
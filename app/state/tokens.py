@@ -0,0 +1,101 @@
+import heapq
+import threading
+import time
+from typing import Optional
+
+from app.model import PreVerificationResponse
+
+
+class TokenEntry:
+    __slots__ = ("token", "customer_id", "amount", "expires_at", "verification")
+
+    def __init__(
+        self,
+        token: str,
+        customer_id: str,
+        amount: float,
+        expires_at: float,
+        verification: PreVerificationResponse
+    ):
+        self.token = token
+        self.customer_id = customer_id
+        self.amount = amount
+        self.expires_at = expires_at
+        self.verification = verification
+
+
+class TokenStore:
+    # Pre-verification tokens keyed by the token itself, so a customer can
+    # hold any number of outstanding tokens and lookups are one dict get.
+    #
+    # A min-heap on expiry drives eviction: every put() pops whatever has
+    # expired (O(log n) each), and when the store is at max_size the
+    # soonest-to-expire token makes room. Heap entries whose token is
+    # already gone are skipped when they surface.
+
+    def __init__(self, max_size: int = 100_000, clock=time.time):
+        self.max_size = max_size
+        self.clock = clock
+
+        self._tokens = {}
+        self._expiry_heap = []
+        self._lock = threading.Lock()
+
+        self.expired = 0
+        self.evicted = 0
+
+    def put(
+        self,
+        customer_id: str,
+        amount: float,
+        verification: PreVerificationResponse
+    ) -> TokenEntry:
+        entry = TokenEntry(
+            verification.verification_token,
+            customer_id,
+            amount,
+            verification.expires_at.timestamp(),
+            verification
+        )
+        with self._lock:
+            self._expire_locked(self.clock())
+            while len(self._tokens) >= self.max_size and self._expiry_heap:
+                _, token = heapq.heappop(self._expiry_heap)
+                if self._tokens.pop(token, None) is not None:
+                    self.evicted += 1
+
+            self._tokens[entry.token] = entry
+            heapq.heappush(self._expiry_heap, (entry.expires_at, entry.token))
+        return entry
+
+    def get(self, token: str) -> Optional[TokenEntry]:
+        entry = self._tokens.get(token)
+        if entry is None or entry.expires_at <= self.clock():
+            return None
+        return entry
+
+    def _expire_locked(self, now: float):
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            _, token = heapq.heappop(heap)
+            entry = self._tokens.get(token)
+            if entry is not None and entry.expires_at <= now:
+                del self._tokens[token]
+                self.expired += 1
+
+    def expire(self) -> int:
+        with self._lock:
+            before = self.expired
+            self._expire_locked(self.clock())
+            return self.expired - before
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._tokens),
+            "max_size": self.max_size,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,143 @@
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+
+
+def epoch_seconds(timestamp: datetime) -> float:
+    # Naive datetimes are taken as local time, as datetime.timestamp() does
+    return timestamp.timestamp()
+
+
+class VelocityTracker:
+    # Sliding window of recent transaction times per customer.
+    #
+    # Each customer holds a deque of epoch seconds, oldest on the left, so
+    # expiring old events is a popleft() and recording is an append():
+    # amortized O(1) per call. Customers live in an OrderedDict kept in
+    # last-activity order, which makes the idle sweep pop from the front
+    # until it meets someone active, and lets the hard cap drop the least
+    # recently seen customer.
+    #
+    # Counts saturate at max_events_per_customer; scoring only distinguishes
+    # up to 5 recent events, so the cap bounds memory without changing risk.
+    #
+    # Times are event times (the transaction's own timestamp). Late events
+    # are inserted in order and counted against the window ending at their
+    # own time. That needs the events just before them, so a customer's
+    # deque is pruned against its newest event minus window + max_lateness,
+    # never against the incoming time; anything later than max_lateness
+    # behind the newest event counts only what is still held. Event times
+    # come from clients, so the idle sweep never uses them as "now": it runs
+    # against the wall clock, and a future-dated transaction cannot expire
+    # everyone else's window.
+    #
+    # A running total of held events backs stats(), so /metrics never walks
+    # every customer's deque under the lock.
+
+    def __init__(
+        self,
+        window: timedelta = timedelta(hours=1),
+        max_customers: int = 500_000,
+        max_events_per_customer: int = 32,
+        sweep_every: int = 1024,
+        max_lateness: timedelta = timedelta(hours=1)
+    ):
+        self.window = window.total_seconds()
+        self.max_lateness = max_lateness.total_seconds()
+        self.max_customers = max_customers
+        self.max_events_per_customer = max_events_per_customer
+        self.sweep_every = sweep_every
+
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+        self._since_sweep = 0
+        self._events = 0
+
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+    def record(self, customer_id: str, ts: float) -> int:
+        # Adds an event at ts and returns how many of the customer's events
+        # fall within the window before it
+        with self._lock:
+            events = self._windows.get(customer_id)
+            if events is None:
+                events = deque(maxlen=self.max_events_per_customer)
+                self._windows[customer_id] = events
+                if len(self._windows) > self.max_customers:
+                    _, dropped = self._windows.popitem(last=False)
+                    self._events -= len(dropped)
+                    self.evicted_capacity += 1
+            else:
+                self._windows.move_to_end(customer_id)
+
+            newest = max(ts, events[-1]) if events else ts
+            horizon = newest - self.window - self.max_lateness
+            while events and events[0] <= horizon:
+                events.popleft()
+                self._events -= 1
+
+            position = bisect_right(events, ts)
+            recent_count = position - bisect_right(events, ts - self.window)
+            # A full deque drops its oldest event to make room
+            if len(events) < events.maxlen:
+                self._events += 1
+            if position == len(events):
+                events.append(ts)
+            else:
+                if len(events) == events.maxlen:
+                    events.popleft()
+                    position = max(0, position - 1)
+                events.insert(position, ts)
+
+            self._since_sweep += 1
+            if self._since_sweep >= self.sweep_every:
+                self._sweep_locked(time.time())
+
+        return recent_count
+
+    def sweep(self, now: float = None) -> int:
+        # Drops customers with no event inside the window ending at now
+        # (the wall clock by default)
+        with self._lock:
+            return self._sweep_locked(time.time() if now is None else now)
+
+    def _sweep_locked(self, now: float) -> int:
+        self._since_sweep = 0
+        cutoff = now - self.window
+        evicted = 0
+        while self._windows:
+            customer_id, events = next(iter(self._windows.items()))
+            if events and events[-1] > cutoff:
+                break
+            self._windows.popitem(last=False)
+            self._events -= len(events)
+            evicted += 1
+        self.evicted_idle += evicted
+        return evicted
+
+    # ------------------------
+    # WARM START
+    # ------------------------
+    def load_events(self, events) -> int:
+        # (customer_id, epoch seconds) pairs, e.g. rebuilt from the DB
+        loaded = 0
+        for customer_id, ts in events:
+            self.record(customer_id, ts)
+            loaded += 1
+        return loaded
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "customers": len(self._windows),
+                "events": self._events,
+                "max_customers": self.max_customers,
+                "evicted_idle": self.evicted_idle,
+                "evicted_capacity": self.evicted_capacity,
+            }
@@ -0,0 +1,108 @@
+"""
+Per-call latency of TransactionRepository: the old connect-per-call path
+against the pooled WAL repository.
+
+    python -m benchmarks.bench_repository --calls 2000 --threads 8
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.repository.transaction import INSERT_SQL, TransactionRepository
+from benchmarks.common import make_pair
+
+
+class LegacyRepository:
+    # The pre-pool implementation: new connection, rollback journal and
+    # statement compile on every call
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def save_transaction(self, transaction, response):
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                INSERT_SQL,
+                TransactionRepository._transaction_row(transaction, response)
+            )
+            conn.commit()
+
+    def has_transactions(self):
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM transactions LIMIT 1")
+            return cursor.fetchone() is not None
+
+
+def _timed(fn, args_list, threads):
+    def one(args):
+        start = time.perf_counter_ns()
+        fn(*args)
+        return time.perf_counter_ns() - start
+
+    if threads <= 1:
+        samples = [one(args) for args in args_list]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            samples = list(pool.map(one, args_list))
+
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "mean_us": statistics.fmean(samples) / 1000,
+        "p50_us": samples[len(samples) // 2] / 1000,
+        "p99_us": samples[int(len(samples) * 0.99) - 1] / 1000,
+    }
+
+
+def run(calls: int, threads: int):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        pooled_path = os.path.join(tmp, "pooled.db")
+
+        # Create the schema with a throwaway pool, then drop back to the
+        # rollback journal the old code ran with
+        TransactionRepository(db_path=legacy_path).pool.close()
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+
+        legacy = LegacyRepository(legacy_path)
+        pooled = TransactionRepository(db_path=pooled_path)
+
+        for name, repo in (("before", legacy), ("after", pooled)):
+            pairs = [make_pair() for _ in range(calls)]
+            results[name] = {
+                "save_transaction": _timed(repo.save_transaction, pairs, threads),
+                "has_transactions": _timed(
+                    repo.has_transactions, [()] * calls, threads
+                ),
+            }
+
+        pooled.pool.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    results = run(args.calls, args.threads)
+    print(f"{'call':<18}{'before p50':>12}{'after p50':>12}{'before p99':>12}{'after p99':>12}  (us)")
+    for call in results["before"]:
+        before, after = results["before"][call], results["after"][call]
+        print(
+            f"{call:<18}{before['p50_us']:>12.1f}{after['p50_us']:>12.1f}"
+            f"{before['p99_us']:>12.1f}{after['p99_us']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Checks that RiskEngine.calculate_risk_scores (the batch path) returns exactly
+what calculate_risk_score returns when called on each transaction in turn,
+each side on a fresh engine.
+
+    python -m benchmarks.check_batch_scoring --transactions 20000
+
+Traffic covers every amount band edge, every hour of the day, same-customer
+bursts and late (out-of-order) events. Exits with status 1 on any mismatch.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.risk_detection import AMOUNT_BOUNDS, RiskEngine
+from benchmarks.common import make_transaction
+
+
+def _traffic(n, customers, seed):
+    rng = np.random.default_rng(seed)
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+    edges = [bound + delta for bound in AMOUNT_BOUNDS for delta in (-0.01, 0.0, 0.01)]
+
+    transactions = []
+    for i in range(n):
+        # Mostly moving forward in time, with the odd event arriving late
+        offset = i * 5 - (int(rng.integers(0, 3600)) if rng.random() < 0.05 else 0)
+        amount = (
+            float(rng.choice(edges)) if rng.random() < 0.2
+            else round(float(rng.lognormal(5, 1.2)), 2)
+        )
+        transactions.append(make_transaction(
+            f"cust_{int(rng.integers(customers)):05d}",
+            start + timedelta(seconds=offset),
+            amount
+        ))
+    return transactions
+
+
+def check(transactions, batch_size):
+    sequential_engine = RiskEngine()
+    sequential = [sequential_engine.calculate_risk_score(t) for t in transactions]
+
+    batch_engine = RiskEngine()
+    batched = []
+    for i in range(0, len(transactions), batch_size):
+        batched.extend(batch_engine.calculate_risk_scores(transactions[i:i + batch_size]))
+
+    return [
+        (transaction, expected, got)
+        for transaction, expected, got in zip(transactions, sequential, batched)
+        if expected.model_dump() != got.model_dump()
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--transactions", type=int, default=20_000)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    transactions = _traffic(args.transactions, args.customers, args.seed)
+    mismatches = check(transactions, args.batch_size)
+
+    for transaction, expected, got in mismatches[:10]:
+        print(f"{transaction.transaction_id} {transaction.customer_id} "
+              f"{transaction.amount} {transaction.timestamp:%H:%M:%S}")
+        print(f"  sequential: {expected.model_dump()}")
+        print(f"  batch:      {got.model_dump()}")
+    print(f"{len(transactions):,} transactions, {len(mismatches):,} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
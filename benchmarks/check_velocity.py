@@ -0,0 +1,113 @@
+"""
+Checks the velocity trackers against a brute-force reference: every count
+record() returns must equal the number of the customer's earlier events in
+the window ending at the event's own time (capped at the tracker's limit).
+
+    python -m benchmarks.check_velocity --events 20000
+
+Runs VelocityTracker and SharedVelocityTracker (on a temporary SQLite file)
+over the same stream: mostly in-order events with a share of late ones, up
+to --max-late-minutes behind the customer's newest event. Exits with status
+1 on any mismatch, or if VelocityTracker.stats() drifts from the events
+it holds.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from bisect import bisect_right, insort
+from datetime import timedelta
+
+import numpy as np
+
+from app.repository.pool import get_pool
+from app.state.backend import SharedVelocityTracker
+from app.state.velocity import VelocityTracker
+
+
+def _stream(n, customers, late_share, max_late, seed):
+    # Ends at the wall clock; the checks turn off the idle sweep and purge,
+    # which run against it, so early events stay put
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    clock = now - 2.0 * n
+    events = []
+    for _ in range(n):
+        clock += float(rng.exponential(2.0))
+        ts = clock
+        if rng.random() < late_share:
+            ts -= float(rng.uniform(0, max_late))
+        events.append((f"cust_{int(rng.integers(customers)):04d}", round(ts, 6)))
+    return events
+
+
+def _reference(events, window, cap):
+    seen = {}
+    counts = []
+    for customer_id, ts in events:
+        history = seen.setdefault(customer_id, [])
+        count = bisect_right(history, ts) - bisect_right(history, ts - window)
+        counts.append(min(count, cap))
+        insort(history, ts)
+    return counts
+
+
+def check(tracker, events, expected, cap):
+    return [
+        (customer_id, ts, want, got)
+        for (customer_id, ts), want in zip(events, expected)
+        for got in (min(tracker.record(customer_id, ts), cap),)
+        if got != want
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--customers", type=int, default=300)
+    parser.add_argument("--late-share", type=float, default=0.05)
+    parser.add_argument("--max-late-minutes", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    window = timedelta(hours=1)
+    # Scoring tells apart up to 5 recent events; the trackers saturate
+    # further out, at their per-customer limits
+    cap = 5
+    events = _stream(
+        args.events, args.customers, args.late_share, args.max_late_minutes * 60, args.seed
+    )
+    expected = _reference(events, window.total_seconds(), cap)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        trackers = {
+            "memory": VelocityTracker(window=window, sweep_every=args.events + 1),
+            "sqlite": SharedVelocityTracker(
+                get_pool(os.path.join(tmp, "state.db")),
+                window=window,
+                purge_every=args.events + 1
+            ),
+        }
+        for name, tracker in trackers.items():
+            mismatches = check(tracker, events, expected, cap)
+            for customer_id, ts, want, got in mismatches[:5]:
+                print(f"  {name}: {customer_id} at {ts:.6f}: expected {want}, got {got}")
+            print(f"{name}: {len(events):,} events, {len(mismatches):,} mismatches")
+            failed = failed or bool(mismatches)
+        # stats() reports a running total; it must match what is held
+        memory = trackers["memory"]
+        held = sum(len(events) for events in memory._windows.values())
+        if memory.stats()["events"] != held:
+            print(f"memory: stats() reports {memory.stats()['events']:,} events, holds {held:,}")
+            failed = True
+        trackers["sqlite"].pool.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Helpers shared by the benchmark scripts: request/response builders for the
+repository and scoring cases, and the commit id stamped on saved reports.
+"""
+import subprocess
+import uuid
+from datetime import datetime
+
+from app.model import (
+    AuthorizationResponse,
+    RiskAssessment,
+    RiskLevel,
+    Transaction,
+    TransactionStatus,
+)
+
+
+def make_transaction(customer_id="cust_00001", when=None, amount=125.0):
+    return Transaction(
+        transaction_id=str(uuid.uuid4()),
+        customer_id=customer_id,
+        merchant_id="merchant_001",
+        amount=amount,
+        timestamp=when or datetime.now()
+    )
+
+
+def make_response(transaction):
+    return AuthorizationResponse(
+        transaction_id=transaction.transaction_id,
+        status=TransactionStatus.APPROVED,
+        approved=True,
+        risk_assessment=RiskAssessment(
+            risk_score=10.0,
+            risk_level=RiskLevel.LOW,
+            confidence=0.5,
+            is_fraud=False,
+            fraud_prob=0.1
+        ),
+        message="Transaction approved - Low risk",
+        processing_time_ms=0.1
+    )
+
+
+def make_pair(customer_id="cust_00001"):
+    transaction = make_transaction(customer_id)
+    return transaction, make_response(transaction)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,336 @@
+"""
+Load generator for /authorize and /preverify. Traffic comes from the
+synthetic population, mixing plain authorizations, pre-verify -> authorize
+pairs and same-customer bursts that push velocity scoring up.
+
+In-process, against the ASGI app with no network in between:
+
+    python -m benchmarks.load_test --concurrency 32 --duration 30
+
+Against a running server:
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 64
+
+Writes a JSON report (throughput, latency percentiles and error rates per
+endpoint) to --output, so runs on different commits can be compared.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import platform
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import numpy as np
+
+from app.core.population import DEFAULT_SEED, generate_population, generate_transaction
+from benchmarks.common import git_commit
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+# ------------------------
+# TRAFFIC
+# ------------------------
+class TrafficMix:
+    # One flow is a short sequence of requests from a single customer that
+    # has to run in order (a pre-verify before the authorize it unlocks, or
+    # a burst of purchases seconds apart)
+
+    def __init__(
+        self,
+        customers: int,
+        seed: int = DEFAULT_SEED,
+        preverify_share: float = 0.1,
+        burst_share: float = 0.05,
+        burst_size: int = 6,
+        preverify_multiplier: float = 8.0
+    ):
+        self.customers = list(generate_population(customers, seed=seed).values())
+        self.rng = np.random.default_rng(seed)
+        self.preverify_share = preverify_share
+        self.burst_share = burst_share
+        self.burst_size = burst_size
+        self.preverify_multiplier = preverify_multiplier
+
+    def _transaction(self, traits, when: datetime, amount=None):
+        # Amount and merchant follow the customer's profile; the timestamp is
+        # live so velocity counts against real recent activity
+        transaction = generate_transaction(traits)
+        transaction["transaction_id"] = str(uuid.uuid4())
+        transaction["timestamp"] = when.isoformat()
+        if amount is not None:
+            transaction["amount"] = amount
+        return transaction
+
+    def next_flow(self):
+        traits = self.customers[self.rng.integers(len(self.customers))]
+        now = datetime.now()
+        draw = self.rng.random()
+
+        if draw < self.preverify_share:
+            amount = round(traits.mean_spend * self.preverify_multiplier, 2)
+            transaction = self._transaction(traits, now, amount)
+            return "preverify_pair", [
+                ("preverify", {
+                    "customer_id": traits.customer_id,
+                    "amount": amount,
+                    "merchant_id": transaction["merchant_id"],
+                }),
+                ("authorize", {"transaction": transaction}),
+            ]
+
+        if draw < self.preverify_share + self.burst_share:
+            return "burst", [
+                ("authorize", {
+                    "transaction": self._transaction(traits, now + timedelta(seconds=i))
+                })
+                for i in range(self.burst_size)
+            ]
+
+        return "authorize", [
+            ("authorize", {"transaction": self._transaction(traits, now)})
+        ]
+
+
+# ------------------------
+# DRIVER
+# ------------------------
+class Recorder:
+
+    def __init__(self):
+        self.latencies_ns = {}
+        self.errors = {}
+        self.statuses = {}
+        self.flows = {}
+        self.pre_verified_accepted = 0
+
+    def request(self, endpoint: str, duration_ns: int, error: str = None):
+        self.latencies_ns.setdefault(endpoint, []).append(duration_ns)
+        if error:
+            errors = self.errors.setdefault(endpoint, {})
+            errors[error] = errors.get(error, 0) + 1
+
+    def decision(self, body: dict):
+        status = body.get("status", "unknown")
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def flow(self, kind: str):
+        self.flows[kind] = self.flows.get(kind, 0) + 1
+
+
+async def _post(client, recorder, endpoint, path, payload):
+    start = time.perf_counter_ns()
+    try:
+        response = await client.post(path, json=payload)
+    except httpx.HTTPError as exc:
+        recorder.request(endpoint, time.perf_counter_ns() - start, type(exc).__name__)
+        return None
+
+    duration = time.perf_counter_ns() - start
+    if response.status_code >= 400:
+        recorder.request(endpoint, duration, f"HTTP {response.status_code}")
+        return None
+    recorder.request(endpoint, duration)
+    return response.json()
+
+
+async def _run_flow(client, recorder, paths, kind, steps):
+    token = None
+    for endpoint, payload in steps:
+        if endpoint == "preverify":
+            body = await _post(client, recorder, endpoint, paths["preverify"], payload)
+            if body is None:
+                return
+            token = body["verification_token"]
+            continue
+
+        if token:
+            payload = dict(payload, customer_verification_token=token)
+        body = await _post(client, recorder, endpoint, paths["authorize"], payload)
+        if body is not None:
+            recorder.decision(body)
+            if token and body.get("status") == "pre_verified":
+                recorder.pre_verified_accepted += 1
+    recorder.flow(kind)
+
+
+async def _worker(client, recorder, paths, mix, deadline, budget):
+    while time.perf_counter() < deadline:
+        if budget is not None:
+            if budget["remaining"] <= 0:
+                return
+            budget["remaining"] -= 1
+        kind, steps = mix.next_flow()
+        await _run_flow(client, recorder, paths, kind, steps)
+
+
+async def _wait_ready(client, timeout: float):
+    # Startup seeding makes /ready return 503; measuring during it would
+    # mostly measure the seed
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    return False
+
+
+def _client(url: str, app_path: str, concurrency: int):
+    if url:
+        limits = httpx.Limits(
+            max_connections=concurrency,
+            max_keepalive_connections=concurrency
+        )
+        return httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0), None
+
+    module_name, _, attr = app_path.partition(":")
+    module = importlib.import_module(module_name)
+    transport = httpx.ASGITransport(app=getattr(module, attr or "app"))
+    return httpx.AsyncClient(transport=transport, base_url="http://inprocess"), module
+
+
+async def run(args) -> dict:
+    mix = TrafficMix(
+        args.customers,
+        seed=args.seed,
+        preverify_share=args.preverify_share,
+        burst_share=args.burst_share,
+        burst_size=args.burst_size
+    )
+    paths = {"authorize": args.authorize_path, "preverify": args.preverify_path}
+    client, module = _client(args.url, args.app, args.concurrency)
+    recorder = Recorder()
+
+    async with client:
+        if not await _wait_ready(client, args.ready_timeout):
+            raise SystemExit("target never reported ready")
+
+        # Warm-up traffic is discarded: first requests pay for imports,
+        # pool connections and statement compilation
+        if args.warmup:
+            warmup = Recorder()
+            await asyncio.gather(*(
+                _worker(client, warmup, paths, mix, time.perf_counter() + args.warmup, None)
+                for _ in range(args.concurrency)
+            ))
+
+        budget = {"remaining": args.flows} if args.flows else None
+        started = time.perf_counter()
+        deadline = started + (args.duration if not args.flows else float("inf"))
+        await asyncio.gather(*(
+            _worker(client, recorder, paths, mix, deadline, budget)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    # The ASGI transport skips lifespan events, so the shutdown hook that
+    # drains the write-behind queue is called here instead
+    if module is not None and hasattr(module, "shutdown"):
+        module.shutdown()
+
+    return _report(args, recorder, elapsed)
+
+
+# ------------------------
+# REPORT
+# ------------------------
+def _latency_summary(samples_ns):
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    summary = {f"p{p}_ms": float(np.percentile(samples, p)) for p in PERCENTILES}
+    summary["mean_ms"] = float(samples.mean())
+    summary["max_ms"] = float(samples.max())
+    return summary
+
+
+def _report(args, recorder, elapsed: float) -> dict:
+    endpoints = {}
+    total_requests = total_errors = 0
+    for endpoint, samples in sorted(recorder.latencies_ns.items()):
+        errors = sum(recorder.errors.get(endpoint, {}).values())
+        total_requests += len(samples)
+        total_errors += errors
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "throughput_rps": len(samples) / elapsed,
+            "errors": errors,
+            "error_rate": errors / len(samples),
+            "error_kinds": recorder.errors.get(endpoint, {}),
+            **_latency_summary(samples),
+        }
+
+    pairs = recorder.flows.get("preverify_pair", 0)
+    return {
+        "commit": git_commit(),
+        "recorded_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "target": args.url or f"in-process:{args.app}",
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration if not args.flows else None,
+            "flows": args.flows,
+            "customers": args.customers,
+            "seed": args.seed,
+            "preverify_share": args.preverify_share,
+            "burst_share": args.burst_share,
+            "burst_size": args.burst_size,
+        },
+        "elapsed_s": elapsed,
+        "requests": total_requests,
+        "throughput_rps": total_requests / elapsed,
+        "error_rate": total_errors / total_requests if total_requests else 0.0,
+        "flows": recorder.flows,
+        "decisions": recorder.statuses,
+        # Share of pairs whose authorize came back pre_verified. Low-risk
+        # pairs are simply approved, so compare runs rather than expect 1.0;
+        # a drop with several workers means tokens are not shared
+        "preverify_acceptance": recorder.pre_verified_accepted / pairs if pairs else None,
+        "endpoints": endpoints,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", help="base URL of a running server; omit to run in-process")
+    parser.add_argument("--app", default="app.main:app", help="ASGI app for in-process runs")
+    parser.add_argument("--authorize-path", default="/authorize")
+    parser.add_argument("--preverify-path", default="/preverify")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of measured load")
+    parser.add_argument("--flows", type=int, default=0, help="run exactly this many flows instead")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load first")
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--preverify-share", type=float, default=0.1)
+    parser.add_argument("--burst-share", type=float, default=0.05)
+    parser.add_argument("--burst-size", type=int, default=6)
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--output", default="load_report.json")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{report['requests']} requests in {report['elapsed_s']:.1f}s "
+          f"({report['throughput_rps']:.0f} req/s, error rate {report['error_rate']:.2%})")
+    print(f"{'endpoint':<12}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<12}{stats['throughput_rps']:>10.0f}{stats['p50_ms']:>10.2f}"
+            f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+    print(f"report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Microbenchmarks for the hot paths: risk scoring, decisions, repository
+writes and reads, and population/history seeding.
+
+    python -m benchmarks.microbench --save benchmarks/microbench_baseline.json
+    python -m benchmarks.microbench --compare benchmarks/microbench_baseline.json --threshold 0.2
+
+--compare exits with status 1 when any case's median time per operation is
+more than --threshold (a fraction) slower than the baseline. Baselines are
+machine specific; record them on the machine that runs the comparison.
+Everything runs in a temporary directory, so no real database is touched.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app.core.history import seed_transaction_history
+from app.core.population import generate_history_batches, generate_population
+from app.model import RiskAssessment, RiskLevel
+from app.repository.transaction import TransactionRepository
+from app.risk_detection import RiskEngine
+from benchmarks.common import git_commit, make_response, make_transaction
+
+CASES = {}
+
+
+def case(name, repeat=5):
+    # Registers fn(number) -> nanoseconds spent on `number` operations;
+    # setup inside fn stays outside the timed region
+    def register(fn):
+        CASES[name] = (fn, repeat)
+        return fn
+    return register
+
+
+def _seeded_repository(db_path, rows):
+    repo = TransactionRepository(db_path=db_path)
+    if not repo.has_transactions():
+        customers = generate_population(max(1, rows // 100))
+        repo.bulk_insert_columns(generate_history_batches(customers, 100))
+    return repo
+
+
+# ------------------------
+# RISK ENGINE
+# ------------------------
+@case("risk_score.cold")
+def bench_risk_cold(number):
+    # Every call is a customer the tracker has never seen
+    engine = RiskEngine()
+    now = datetime.now()
+    transactions = [make_transaction(f"cold_{i}", now) for i in range(number)]
+
+    start = time.perf_counter_ns()
+    for transaction in transactions:
+        engine.calculate_risk_score(transaction)
+    return time.perf_counter_ns() - start
+
+
+@case("risk_score.warm")
+def bench_risk_warm(number):
+    # A few hundred customers that each already hold a full-ish window
+    engine = RiskEngine()
+    now = datetime.now()
+    customers = [f"warm_{i}" for i in range(500)]
+    for customer_id in customers:
+        for minutes in range(10, 0, -1):
+            engine.calculate_risk_score(
+                make_transaction(customer_id, now - timedelta(minutes=minutes))
+            )
+    transactions = [
+        make_transaction(customers[i % len(customers)], now + timedelta(microseconds=i))
+        for i in range(number)
+    ]
+
+    start = time.perf_counter_ns()
+    for transaction in transactions:
+        engine.calculate_risk_score(transaction)
+    return time.perf_counter_ns() - start
+
+
+@case("make_decision")
+def bench_make_decision(number):
+    # Low risk, high risk pre-verified and high risk declined, in turn
+    from app.authorize import AuthorizationEngine
+    engine = AuthorizationEngine(seed_mode="off")
+    assessments = [
+        (RiskAssessment(risk_score=score, risk_level=level, confidence=0.8,
+                        is_fraud=score >= 70, fraud_prob=score / 100), pre_verified)
+        for score, level, pre_verified in (
+            (20.0, RiskLevel.LOW, False),
+            (75.0, RiskLevel.HIGH, True),
+            (75.0, RiskLevel.HIGH, False),
+        )
+    ]
+    calls = [assessments[i % 3] for i in range(number)]
+
+    start = time.perf_counter_ns()
+    for assessment, pre_verified in calls:
+        engine._make_decision(assessment, pre_verified, 250.0)
+    elapsed = time.perf_counter_ns() - start
+    engine.close()
+    return elapsed
+
+
+# ------------------------
+# REPOSITORY
+# ------------------------
+@case("save_transaction.single")
+def bench_save_single(number):
+    repo = TransactionRepository(db_path="save_single.db")
+    pairs = [(t, make_response(t)) for t in (make_transaction("cust_00001") for _ in range(number))]
+
+    start = time.perf_counter_ns()
+    for transaction, response in pairs:
+        repo.save_transaction(transaction, response)
+    return time.perf_counter_ns() - start
+
+
+@case("save_transaction.batched")
+def bench_save_batched(number, batch_size=100):
+    # Same rows as the single case, written 100 per transaction; the
+    # reported figure is still per row
+    repo = TransactionRepository(db_path="save_batched.db")
+    pairs = [(t, make_response(t)) for t in (make_transaction("cust_00001") for _ in range(number))]
+    batches = [pairs[i:i + batch_size] for i in range(0, number, batch_size)]
+
+    start = time.perf_counter_ns()
+    for batch in batches:
+        repo.save_transactions(batch)
+    return time.perf_counter_ns() - start
+
+
+def _bench_get_all(rows):
+    def bench(number):
+        repo = _seeded_repository(f"read_{rows}.db", rows)
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            repo.get_all_transactions()
+        return time.perf_counter_ns() - start
+    return bench
+
+
+# ------------------------
+# SEEDING
+# ------------------------
+@case("generate_population.10k", repeat=3)
+def bench_generate_population(number):
+    start = time.perf_counter_ns()
+    for _ in range(number):
+        generate_population(10_000)
+    return time.perf_counter_ns() - start
+
+
+@case("seed_transaction_history.100k", repeat=3)
+def bench_seed_history(number):
+    # 1,000 customers x 100 rows into an empty default database each round
+    customers = generate_population(1_000)
+    repo = TransactionRepository()
+    elapsed = 0
+    for _ in range(number):
+        # Emptied through the pool: deleting the file under open pooled
+        # connections would leave them writing to the unlinked inode
+        with repo.pool.connection() as conn:
+            conn.execute("DELETE FROM transactions")
+            conn.execute("DELETE FROM merchant_daily_rollup")
+            conn.execute("DELETE FROM time_rollup")
+        start = time.perf_counter_ns()
+        seed_transaction_history(customers, transactions_per_customer=100)
+        elapsed += time.perf_counter_ns() - start
+    return elapsed
+
+
+# ------------------------
+# RUNNER
+# ------------------------
+# Operations per timed round, sized so each round takes a fraction of a second
+NUMBERS = {
+    "risk_score.cold": 5_000,
+    "risk_score.warm": 5_000,
+    "make_decision": 100_000,
+    "save_transaction.single": 1_000,
+    "save_transaction.batched": 5_000,
+    "generate_population.10k": 1,
+    "seed_transaction_history.100k": 1,
+}
+
+
+def _register_read_cases(sizes):
+    for rows in sizes:
+        label = f"{rows // 1_000_000}m" if rows >= 1_000_000 else f"{rows // 1_000}k"
+        name = f"get_all_transactions.{label}"
+        CASES[name] = (_bench_get_all(rows), 3)
+        NUMBERS[name] = 1
+
+
+def run(selected, scale: float = 1.0) -> dict:
+    results = {}
+    for name in selected:
+        fn, repeat = CASES[name]
+        number = max(1, int(NUMBERS[name] * scale))
+        fn(max(1, number // 10))  # warm-up: imports, first connections, caches
+
+        per_op = [fn(number) / number for _ in range(repeat)]
+        results[name] = {
+            "ops": number,
+            "repeat": repeat,
+            "median_ns": statistics.median(per_op),
+            "min_ns": min(per_op),
+        }
+        print(f"{name:<34}{_format_ns(results[name]['median_ns']):>14}")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    regressions = []
+    print(f"\n{'case':<34}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, current in results.items():
+        previous = baseline["cases"].get(name)
+        if previous is None:
+            print(f"{name:<34}{'-':>14}{_format_ns(current['median_ns']):>14}{'new':>10}")
+            continue
+        change = current["median_ns"] / previous["median_ns"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(
+            f"{name:<34}{_format_ns(previous['median_ns']):>14}"
+            f"{_format_ns(current['median_ns']):>14}{change:>+10.1%}{flag}"
+        )
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _format_ns(ns: float) -> str:
+    for unit, size in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= size:
+            return f"{ns / size:.2f} {unit}"
+    return f"{ns:.0f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-k", "--filter", default="", help="only cases containing this text")
+    parser.add_argument(
+        "--sizes", default="10000,100000,1000000",
+        help="row counts for the get_all_transactions cases"
+    )
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply operations per round")
+    parser.add_argument("--save", help="write results as a baseline to this path")
+    parser.add_argument("--compare", help="baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    _register_read_cases([int(size) for size in args.sizes.split(",") if size])
+    selected = [name for name in CASES if args.filter in name]
+
+    # Baseline paths are given relative to where the command was run
+    save_path = os.path.abspath(args.save) if args.save else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            results = run(selected, args.scale)
+        finally:
+            os.chdir(cwd)
+
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "recorded_at": datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "cases": results,
+            }, f, indent=2)
+        print(f"\nbaseline written to {args.save}")
+
+    if compare_path:
+        with open(compare_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()